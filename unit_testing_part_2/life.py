@@ -1,8 +1,78 @@
+from array import array
+import collections
+import hashlib
+import itertools
+import json
+import os
+import time
+import tracemalloc
+
+# functions that map a cell to each of the eight rotations and reflections
+_TRANSFORMS = (
+    lambda x, y: (x, y),
+    lambda x, y: (-y, x),
+    lambda x, y: (-x, -y),
+    lambda x, y: (y, -x),
+    lambda x, y: (-x, y),
+    lambda x, y: (y, x),
+    lambda x, y: (x, -y),
+    lambda x, y: (-y, -x),
+)
+
+# side of the tiles of window positions that Life.find() correlates at once
+_FIND_TILE = 256
+
+
+def _normalize_with_offset(cells):
+    """Shift cells so that their bounding box starts at (0, 0).
+
+    Returns the top-left corner of the original bounding box along with
+    the shifted cells.
+    """
+    cells = list(cells)
+    if not cells:
+        return 0, 0, frozenset()
+    minx = min(x for x, y in cells)
+    miny = min(y for x, y in cells)
+    return minx, miny, frozenset((x - minx, y - miny) for x, y in cells)
+
+
+def _normalize(cells):
+    """Shift cells so that their bounding box starts at (0, 0)."""
+    return _normalize_with_offset(cells)[2]
+
+
+def _orientations(cells, transforms=_TRANSFORMS):
+    """Return the distinct normalized orientations of a group of cells."""
+    cells = list(cells)
+    result = []
+    for transform in transforms:
+        oriented = _normalize(transform(x, y) for x, y in cells)
+        if oriented not in result:
+            result.append(oriented)
+    return result
+
+
+def canonical(cells):
+    """Return a key that identifies a group of cells.
+
+    The key does not change when the cells are moved, rotated or reflected.
+    """
+    shape = min(tuple(sorted(oriented)) for oriented in _orientations(cells))
+    return hashlib.sha1(repr(shape).encode()).hexdigest()[:16]
+
+
 class CellList:
     """Maintain a list of (x, y) cells."""
 
     def __init__(self):
         self.cells = {}
+        # rows that can be modified in place when the list shares its rows
+        # with copies, or None when the list owns all its rows
+        self._owned = None
+        self._shared = False
+        # cached result of as_array(), discarded when the list is modified
+        self._array = None
 
     def has(self, x, y):
         """Check if a cell exists in this list."""
@@ -12,6 +82,9 @@ class CellList:
         """Add, remove or toggle a cell in this list."""
         if value is None:
             value = not self.has(x, y)
+        self._array = None
+        if self._owned is not None and self.has(x, y) != value:
+            self._own_row(y)
         if value:
             row = self.cells.setdefault(y, set())
             if x not in row:
@@ -25,20 +98,417 @@ class CellList:
                 if not self.cells[y]:
                     del self.cells[y]
 
+    def add_rows(self, rows):
+        """Add many cells at once.
+
+        The rows argument maps y coordinates to iterables with the x
+        coordinates of the cells to add in each row.
+        """
+        self._array = None
+        for y, xs in rows.items():
+            if self._owned is not None:
+                self._own_row(y)
+            row = self.cells.get(y)
+            if row is None:
+                row = set(xs)
+                if row:
+                    self.cells[y] = row
+            else:
+                row.update(xs)
+
     def __iter__(self):
         """Iterator over the cells in this list."""
         for y in self.cells:
             for x in self.cells[y]:
                 yield (x, y)
 
+    def __contains__(self, cell):
+        """Check if a (x, y) cell exists in this list."""
+        return self.has(*cell)
+
+    def as_array(self):
+        """Return the cells as a read-only buffer of 32-bit integers.
+
+        The result is a memoryview with shape (N, 2) and one (x, y) row per
+        cell, which NumPy can use without copying it. An empty list gives an
+        empty view with shape (0,), as memoryviews cannot have a zero in
+        their shape. The view is cached until the list is modified.
+        """
+        if self._array is None:
+            self._array = _as_array(self)
+        return self._array
+
+    def query(self, x0, y0, x1, y1):
+        """Return a new list with the cells inside a rectangle.
+
+        The rectangle includes the cells with x0 <= x < x1 and y0 <= y < y1.
+        Each row is looked up by its coordinate, or each cell by its
+        position, when that is shorter than scanning the list, so the cost
+        is bounded by the size of the rectangle as well as by the number of
+        cells in the list.
+        """
+        result = CellList()
+        if y1 - y0 < len(self.cells):
+            rows = ((y, self.cells.get(y)) for y in range(y0, y1))
+        else:
+            rows = ((y, row) for y, row in self.cells.items() if y0 <= y < y1)
+        for y, row in rows:
+            if not row:
+                continue
+            if x1 - x0 < len(row):
+                row = {x for x in range(x0, x1) if x in row}
+            else:
+                row = {x for x in row if x0 <= x < x1}
+            if row:
+                result.cells[y] = row
+        return result
+
+    def copy(self):
+        """Return a copy of this list.
+
+        The copy shares its rows with this list, and a row is only
+        duplicated when one of the lists modifies it.
+        """
+        result = CellList()
+        result.cells = self.cells
+        result._owned = set()
+        result._shared = True
+        self._owned = set()
+        self._shared = True
+        return result
+
+    def _own_row(self, y):
+        """Make a private copy of a shared row before it is modified."""
+        if self._shared:
+            self.cells = dict(self.cells)
+            self._shared = False
+        if y not in self._owned:
+            row = self.cells.get(y)
+            if row is not None:
+                self.cells[y] = set(row)
+            self._owned.add(y)
+
+    def __len__(self):
+        """Return the number of cells in this list."""
+        return sum(len(row) for row in self.cells.values())
+
+    def __eq__(self, other):
+        """Check if two lists contain the same cells."""
+        if not isinstance(other, CellList):
+            return NotImplemented
+        return self.cells == other.cells
+
+    def union(self, other):
+        """Return a new list with the cells that are in either list."""
+        result = CellList()
+        for y, row in self.cells.items():
+            result.cells[y] = set(row)
+        for y, row in other.cells.items():
+            if y in result.cells:
+                result.cells[y] |= row
+            else:
+                result.cells[y] = set(row)
+        return result
+
+    def intersection(self, other):
+        """Return a new list with the cells that are in both lists."""
+        if len(other.cells) < len(self.cells):
+            self, other = other, self
+        result = CellList()
+        for y, row in self.cells.items():
+            other_row = other.cells.get(y)
+            if other_row:
+                row = row & other_row
+                if row:
+                    result.cells[y] = row
+        return result
+
+    def difference(self, other):
+        """Return a new list with the cells that are not in the other list."""
+        result = CellList()
+        for y, row in self.cells.items():
+            other_row = other.cells.get(y)
+            if other_row:
+                row = row - other_row
+                if row:
+                    result.cells[y] = row
+            else:
+                result.cells[y] = set(row)
+        return result
+
+    def symmetric_difference(self, other):
+        """Return a new list with the cells that are in only one list."""
+        result = CellList()
+        for y, row in self.cells.items():
+            other_row = other.cells.get(y)
+            if other_row:
+                row = row ^ other_row
+                if row:
+                    result.cells[y] = row
+            else:
+                result.cells[y] = set(row)
+        for y, row in other.cells.items():
+            if y not in self.cells:
+                result.cells[y] = set(row)
+        return result
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+    def translate(self, dx, dy):
+        """Return a new list with all the cells shifted by (dx, dy)."""
+        result = CellList()
+        for y, row in self.cells.items():
+            if dx:
+                result.cells[y + dy] = {x + dx for x in row}
+            else:
+                result.cells[y + dy] = set(row)
+        return result
+
+
+def _pack(cells):
+    """Pack an iterable of (x, y) cells into a compact array of integers."""
+    return array('i', itertools.chain.from_iterable(cells))
+
+
+def _as_array(cells):
+    """Return a read-only (N, 2) view of an iterable of (x, y) cells."""
+    view = memoryview(_pack(cells)).toreadonly()
+    if not view:
+        return view
+    return view.cast('B').cast('i', (len(view) // 2, 2))
+
+
+def _apply(cell_list, packed, value):
+    """Set or clear the cells stored in a packed array."""
+    for i in range(0, len(packed), 2):
+        cell_list.set(packed[i], packed[i + 1], value)
+
+
+class History:
+    """Record the past generations of a game.
+
+    A full checkpoint of the grid is stored every checkpoint_interval
+    generations, and the births and deaths of every generation are stored
+    as deltas. Cells are packed in arrays of integers, and the oldest
+    records are discarded when they take more than max_memory bytes.
+    """
+
+    def __init__(self, checkpoint_interval=32, max_memory=8 * 1024 * 1024):
+        self.checkpoint_interval = checkpoint_interval
+        self.max_memory = max_memory
+        self.records = collections.deque()
+        self.memory = 0
+
+    @property
+    def oldest(self):
+        """The oldest generation that can be restored."""
+        return self.records[0][0]
+
+    @property
+    def newest(self):
+        """The newest recorded generation."""
+        return self.records[-1][0]
+
+    def reset(self, generation, alive):
+        """Discard all records and start again from the given grid."""
+        self.records.clear()
+        self.memory = 0
+        self._append(generation, _pack(alive), _pack([]), _pack([]))
+
+    def record(self, generation, old_alive, new_alive):
+        """Record the transition from the previous generation."""
+        births = _pack(new_alive - old_alive)
+        deaths = _pack(old_alive - new_alive)
+        checkpoint = None
+        if generation % self.checkpoint_interval == 0:
+            checkpoint = _pack(new_alive)
+        self._append(generation, checkpoint, births, deaths)
+        # the oldest records are discarded one checkpoint at a time, so
+        # that the oldest remaining record is always a checkpoint
+        while self.memory > self.max_memory:
+            try:
+                end = next(i for i, record in enumerate(self.records)
+                           if i > 0 and record[1] is not None)
+            except StopIteration:
+                break
+            for i in range(end):
+                self.memory -= self._size(self.records.popleft())
+
+    def truncate(self, generation):
+        """Discard the records of the generations after the given one."""
+        while self.records and self.newest > generation:
+            self.memory -= self._size(self.records.pop())
+
+    def state(self, generation, alive):
+        """Return the grid at a past generation.
+
+        The alive argument must be the grid at the newest generation. The
+        grid is rebuilt by undoing deltas from the newest generation or by
+        replaying deltas from the closest checkpoint, whichever is shorter.
+        """
+        index = generation - self.oldest
+        newest = len(self.records) - 1
+        checkpoint = index
+        while self.records[checkpoint][1] is None:
+            checkpoint -= 1
+        if newest - index <= index - checkpoint:
+            result = alive.copy()
+            for i in range(newest, index, -1):
+                _, _, births, deaths = self.records[i]
+                _apply(result, births, False)
+                _apply(result, deaths, True)
+        else:
+            result = type(alive)()
+            _apply(result, self.records[checkpoint][1], True)
+            for i in range(checkpoint + 1, index + 1):
+                _, _, births, deaths = self.records[i]
+                _apply(result, births, True)
+                _apply(result, deaths, False)
+        return result
+
+    def _append(self, generation, checkpoint, births, deaths):
+        record = (generation, checkpoint, births, deaths)
+        self.records.append(record)
+        self.memory += self._size(record)
+
+    @staticmethod
+    def _size(record):
+        _, checkpoint, births, deaths = record
+        size = births.itemsize * (len(births) + len(deaths))
+        if checkpoint is not None:
+            size += checkpoint.itemsize * len(checkpoint)
+        return size
+
+
+class _PhaseTimer:
+    """Store the time spent in each phase of a generation in a stats entry.
+
+    Nothing is measured when there is no stats entry.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = time.perf_counter() if stats is not None else None
+
+    def lap(self, phase):
+        """Record the time since the previous phase ended."""
+        if self.stats is not None:
+            now = time.perf_counter()
+            self.stats['time'][phase] = now - self.start
+            self.start = now
+
+
+class _ProbeCounter:
+    """Wrap a cell list or set to count the probes made on it."""
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.probes = 0
+
+    def has(self, x, y):
+        self.probes += 1
+        return self.cells.has(x, y)
+
+    def __contains__(self, item):
+        self.probes += 1
+        return item in self.cells
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class AdvanceStats:
+    """Statistics collected by Life.advance() for each generation.
+
+    Each generation is recorded as a dictionary with the wall time spent in
+    each phase of the algorithm, as listed in the PHASES of the game class,
+    the number of cells examined and the number of probes on the grid. When
+    trace_memory is set, the peak memory allocated during the generation is
+    also recorded, using the tracemalloc module. Callbacks are called with
+    each new record.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.generations = []
+        self.callbacks = []
+        # set when tracemalloc was started for these statistics, so that
+        # it is stopped with them
+        self.started_tracing = False
+
+    def record(self, entry):
+        """Add the record of a generation and pass it to the callbacks."""
+        self.generations.append(entry)
+        for callback in self.callbacks:
+            callback(entry)
+
+    def totals(self):
+        """Return the time of each phase added over all generations."""
+        totals = {}
+        for entry in self.generations:
+            for phase, seconds in entry['time'].items():
+                totals[phase] = totals.get(phase, 0) + seconds
+        return totals
+
+    def to_json(self):
+        """Return the statistics as a JSON string."""
+        return json.dumps({'generations': self.generations,
+                           'totals': self.totals()})
+
+
+class Region:
+    """Region of interest of a game.
+
+    Every interval generations, the objects that are completely outside of
+    the region and do not touch any other cells are checked, and those that
+    are spaceships moving away from the region are removed. When log is set,
+    each removed object is recorded in escaped as a dictionary with the
+    generation, the top-left corner of the object, the distance it moves in
+    each period and its period.
+    """
+
+    def __init__(self, minx, miny, maxx, maxy, interval=16, max_period=16,
+                 log=False):
+        self.minx = minx
+        self.miny = miny
+        self.maxx = maxx
+        self.maxy = maxy
+        self.interval = interval
+        self.max_period = max_period
+        self.escaped = [] if log else None
+
+    def contains(self, x, y):
+        """Check if a cell is inside the region."""
+        return self.minx <= x <= self.maxx and self.miny <= y <= self.maxy
+
+    def distance(self, minx, miny, maxx, maxy):
+        """Return how far a bounding box is from the region.
+
+        The distance is positive when the box is completely outside.
+        """
+        return max(self.minx - maxx, minx - self.maxx,
+                   self.miny - maxy, miny - self.maxy)
+
 
 class Life:
     """Game of Life simulation."""
+    # phases of _next_generation() timed by the statistics of advance()
+    PHASES = ('candidates', 'rules', 'rebuild')
 
     def __init__(self, survival=[2, 3], birth=[3]):
         self.survival = survival
         self.birth = birth
         self.alive = CellList()
+        self.generation = 0
+        self.history = None
+        self.stats = None
+        self.region = None
 
     def rules_str(self):
         """Return the rules of the game as a printable string."""
@@ -77,15 +547,93 @@ class Life:
                         self.alive.set(x, y, True)
             else:
                 raise RuntimeError('Unknown file format')
+        self._edited()
 
     def toggle(self, x, y):
         """Toggle a cell in the grid."""
         self.alive.set(x, y)
+        self._edited()
+
+    def place(self, pattern, x, y):
+        """Add the living cells of a pattern to the grid.
+
+        The pattern can be another Life game, a CellList or any iterable of
+        (x, y) cells, and it is placed with its origin at (x, y). All the
+        cells are added in one bulk insert.
+        """
+        if isinstance(pattern, Life):
+            pattern = pattern.alive
+        rows = collections.defaultdict(list)
+        for px, py in pattern:
+            rows[y + py].append(x + px)
+        self.alive.add_rows(rows)
+        self._edited()
+
+    def _edited(self):
+        """Restart the history after the grid was modified."""
+        if self.history is not None:
+            self.history.reset(self.generation, self.alive)
+
+    def keep_history(self, checkpoint_interval=32,
+                     max_memory=8 * 1024 * 1024):
+        """Start recording past generations.
+
+        Recorded generations can be restored with rewind() and at(). The
+        history is restarted whenever the grid is modified with load() or
+        toggle().
+        """
+        self.history = History(checkpoint_interval, max_memory)
+        self.history.reset(self.generation, self.alive)
+
+    def set_region(self, minx, miny, maxx, maxy, interval=16, max_period=16,
+                   log=False):
+        """Remove the spaceships that escape from a region of interest.
+
+        Returns the Region object, see its documentation for the details.
+        Set the region attribute to None to keep all the objects again.
+        """
+        self.region = Region(minx, miny, maxx, maxy, interval, max_period, log)
+        return self.region
+
+    def fork(self):
+        """Return a copy of this game.
+
+        The copy shares the rows of its grid with this game, so forking is
+        cheap, and memory grows only as the two games diverge. The history
+        of this game is not copied.
+        """
+        life = type(self)(list(self.survival), list(self.birth))
+        life.alive = self.alive.copy()
+        life.generation = self.generation
+        return life
+
+    def at(self, generation):
+        """Return a CellList with the living cells at a past generation."""
+        if generation == self.generation:
+            return self.alive.copy()
+        if self.history is None or \
+                not self.history.oldest <= generation <= self.generation:
+            raise ValueError(f'Generation {generation} is not available')
+        return self.history.state(generation, self.alive)
+
+    def rewind(self, generations=1):
+        """Go back to a past generation."""
+        self.alive = self.at(self.generation - generations)
+        self.generation -= generations
+        if self.history is not None:
+            self.history.truncate(self.generation)
 
     def living_cells(self):
         """Iterate over the living cells."""
         return self.alive.__iter__()
 
+    def living_cells_array(self):
+        """Return the living cells as an (N, 2) buffer of 32-bit integers.
+
+        See CellList.as_array() for the details.
+        """
+        return self.alive.as_array()
+
     def bounding_box(self):
         """Return the bounding box that includes all living cells."""
         minx = miny = maxx = maxy = None
@@ -102,21 +650,281 @@ class Life:
                 maxy = y
         return (minx or 0, miny or 0, maxx or 0, maxy or 0)
 
+    def objects(self):
+        """Split the living cells into groups of connected cells.
+
+        Returns a list with a CellList for each group. Cells are connected
+        when they touch horizontally, vertically or diagonally.
+        """
+        remaining = set(self.living_cells())
+        objects = []
+        while remaining:
+            stack = [remaining.pop()]
+            obj = CellList()
+            while stack:
+                x, y = stack.pop()
+                obj.set(x, y, True)
+                for i in range(-1, 2):
+                    for j in range(-1, 2):
+                        if (x + i, y + j) in remaining:
+                            remaining.remove((x + i, y + j))
+                            stack.append((x + i, y + j))
+            objects.append(obj)
+        return objects
+
+    def period(self, max_generations=1000):
+        """Find when the pattern starts repeating itself.
+
+        The simulation runs on a copy of the grid, so this game is not
+        modified. Returns a (start, period, dx, dy) tuple, where dx and dy
+        give the distance the pattern moves in each period, or None if the
+        pattern does not repeat within max_generations.
+        """
+        life = type(self)(self.survival, self.birth)
+        life.alive = self.alive.copy()
+        seen = {}
+        for generation in range(max_generations + 1):
+            minx, miny, shape = _normalize_with_offset(life.living_cells())
+            if shape in seen:
+                start, startx, starty = seen[shape]
+                return (start, generation - start, minx - startx,
+                        miny - starty)
+            seen[shape] = (generation, minx, miny)
+            life.advance()
+        return None
+
+    def find(self, pattern, orientations='all'):
+        """Find every occurrence of a pattern in the grid.
+
+        The pattern can be another Life game, a CellList or any iterable of
+        (x, y) cells. A match requires the living cells of the pattern to be
+        alive and the rest of its bounding box, plus a one cell margin around
+        it, to be dead. The orientations argument can be 'all' (rotations and
+        reflections), 'rotations' or 'none'. Returns a sorted list with the
+        top-left corner of the bounding box of each match.
+
+        The search computes the 2D cross-correlation of the grid with each
+        orientation of the pattern using FFTs, so it requires numpy. Only
+        the tiles around living cells are searched, so far apart groups of
+        cells do not make the search grid any larger.
+        """
+        import numpy as np
+
+        if isinstance(pattern, Life):
+            pattern = pattern.alive
+        if orientations == 'all':
+            transforms = _TRANSFORMS
+        elif orientations == 'rotations':
+            transforms = _TRANSFORMS[:4]
+        elif orientations == 'none':
+            transforms = _TRANSFORMS[:1]
+        else:
+            raise ValueError(f'Unknown orientations: {orientations}')
+        shapes = _orientations(pattern, transforms)
+        if not shapes[0] or not self.alive:
+            return []
+
+        # kernels score +1 for each living cell and -1 for each dead cell,
+        # so the correlation equals the population only on an exact match
+        kernels = []
+        for shape in shapes:
+            kernel = -np.ones((max(y for x, y in shape) + 3,
+                               max(x for x, y in shape) + 3), np.float32)
+            for x, y in shape:
+                kernel[y + 1, x + 1] = 1
+            kernels.append(kernel)
+
+        # the grid is correlated with overlap-save over tiles of window
+        # positions, where the window of the kernel starts one cell above
+        # and to the left of a match. Each tile reads its own cells plus a
+        # halo the size of the largest kernel, so the memory depends on the
+        # occupied area and not on the bounding box of the grid.
+        halo_y = max(kernel.shape[0] for kernel in kernels) - 1
+        halo_x = max(kernel.shape[1] for kernel in kernels) - 1
+        tile = max(_FIND_TILE, halo_x, halo_y)
+        size = (tile + halo_y, tile + halo_x)
+        kernel_ffts = [np.conj(np.fft.rfft2(kernel, size))
+                       for kernel in kernels]
+
+        # the cells are sorted by the row-major number of their tile, with a
+        # spare tile on each side, so that the cells of consecutive tiles in
+        # a row are next to each other
+        coords = np.asarray(self.living_cells_array()).reshape(-1, 2)
+        tiles = coords.astype(np.int64) // tile
+        left, top = tiles.min(axis=0) - 1
+        columns = int(tiles[:, 0].max()) - left + 2
+        keys = (tiles[:, 1] - top) * columns + tiles[:, 0] - left
+        order = np.argsort(keys)
+        keys = keys[order]
+        coords = coords[order]
+        # a window that reads an occupied tile starts either in that tile
+        # or in the tile before it, along each axis
+        occupied = np.unique(keys)
+        origins = np.unique(np.concatenate(
+            [occupied, occupied - 1, occupied - columns,
+             occupied - columns - 1]))
+        # the halo of the tiles of window positions lies in the next tile
+        # along each axis
+        starts = np.searchsorted(keys, np.concatenate(
+            [origins, origins + columns]))
+        ends = np.searchsorted(keys, np.concatenate(
+            [origins + 2, origins + columns + 2]))
+
+        population = len(shapes[0])
+        matches = set()
+        for i, origin in enumerate(origins.tolist()):
+            cells = np.concatenate(
+                [coords[starts[i]:ends[i]],
+                 coords[starts[i + len(origins)]:ends[i + len(origins)]]])
+            y0 = (origin // columns + top) * tile
+            x0 = (origin % columns + left) * tile
+            cells = cells[(cells[:, 0] < x0 + size[1]) &
+                          (cells[:, 1] < y0 + size[0])]
+            if not len(cells):
+                continue
+            grid = np.zeros(size, np.float32)
+            grid[cells[:, 1] - y0, cells[:, 0] - x0] = 1
+            grid_fft = np.fft.rfft2(grid)
+            for kernel_fft in kernel_ffts:
+                correlation = np.fft.irfft2(grid_fft * kernel_fft, size)
+                ys, xs = np.nonzero(
+                    np.abs(correlation[:tile, :tile] - population) < 0.5)
+                matches.update(zip((xs + x0 + 1).tolist(),
+                                   (ys + y0 + 1).tolist()))
+        return sorted(matches)
+
+    def instrument(self, trace_memory=False, callback=None):
+        """Start collecting statistics on each call to advance().
+
+        Returns the AdvanceStats object where the statistics are stored.
+        Call uninstrument() to stop collecting them.
+        """
+        self.uninstrument()
+        self.stats = AdvanceStats(trace_memory)
+        if callback is not None:
+            self.stats.callbacks.append(callback)
+        return self.stats
+
+    def uninstrument(self):
+        """Stop collecting statistics on each call to advance().
+
+        Memory tracing is stopped if it was started for the statistics, so
+        that it does not slow down the following generations.
+        """
+        if self.stats is not None and self.stats.started_tracing:
+            tracemalloc.stop()
+        self.stats = None
+
     def advance(self):
         """Advance the simulation by one time unit."""
-        processed = CellList()
-        new_alive = CellList()
-        for cell in self.living_cells():
-            x = cell[0]
-            y = cell[1]
+        if self.stats is not None:
+            new_alive = self._advance_instrumented()
+        else:
+            new_alive = self._next_generation()
+        if self.region is not None and \
+                (self.generation + 1) % self.region.interval == 0:
+            self._remove_escaped(new_alive, self.generation + 1)
+        if self.history is not None:
+            self.history.record(self.generation + 1, self.alive, new_alive)
+        self.alive = new_alive
+        self.generation += 1
+
+    def _next_generation(self, stats=None):
+        """Calculate the cells that are alive in the next generation.
+
+        When a stats dictionary is given, the time spent in each of the
+        PHASES is stored in its 'time' entry, and the number of cells
+        examined and of has() probes made on the grid are added to it.
+        """
+        timer = _PhaseTimer(stats)
+        candidates = CellList()
+        for x, y in self.living_cells():
             for i in range(-1, 2):
                 for j in range(-1, 2):
-                    if (x + i, y + j) in processed:
-                        continue
-                    processed.set(x + i, y + j, True)
-                    if self._advance_cell(x + i, y + j):
-                        new_alive.set(x + i, y + j, True)
-        self.alive = new_alive
+                    candidates.set(x + i, y + j, True)
+        timer.lap('candidates')
+
+        if stats is None:
+            states = [self._advance_cell(x, y) for x, y in candidates]
+        else:
+            # count the probes that _advance_cell() makes on the grid
+            alive = self.alive
+            self.alive = probes = _ProbeCounter(alive)
+            try:
+                states = [self._advance_cell(x, y) for x, y in candidates]
+            finally:
+                self.alive = alive
+            stats['has_probes'] += probes.probes
+        timer.lap('rules')
+
+        new_alive = CellList()
+        for (x, y), state in zip(candidates, states):
+            if state:
+                new_alive.set(x, y, True)
+        timer.lap('rebuild')
+        if stats is not None:
+            stats['cells_examined'] += len(states)
+        return new_alive
+
+    def _remove_escaped(self, alive, generation):
+        """Remove the spaceships that left the region from a grid."""
+        region = self.region
+        outside = Life(self.survival, self.birth)
+        for x, y in alive:
+            if not region.contains(x, y):
+                outside.alive.set(x, y, True)
+
+        for obj in outside.objects():
+            # objects that touch other cells, including the cells inside
+            # the region, are not isolated and may not be spaceships
+            if any(alive.has(x + i, y + j) and not obj.has(x + i, y + j)
+                   for x, y in obj for i in range(-1, 2)
+                   for j in range(-1, 2)):
+                continue
+            spaceship = Life(self.survival, self.birth)
+            spaceship.alive = obj
+            result = spaceship.period(region.max_period)
+            if result is None:
+                continue
+            start, period, dx, dy = result
+            minx, miny, maxx, maxy = spaceship.bounding_box()
+            if start != 0 or region.distance(minx + dx, miny + dy, maxx + dx,
+                                             maxy + dy) <= \
+                    region.distance(minx, miny, maxx, maxy):
+                continue
+            for x, y in obj:
+                alive.set(x, y, False)
+            if region.escaped is not None:
+                region.escaped.append({
+                    'generation': generation,
+                    'x': minx,
+                    'y': miny,
+                    'dx': dx,
+                    'dy': dy,
+                    'period': period,
+                })
+
+    def _advance_instrumented(self):
+        """Calculate the next generation, collecting its statistics."""
+        trace_memory = self.stats.trace_memory
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.stats.started_tracing = True
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        counters = {'cells_examined': 0, 'has_probes': 0, 'time': {}}
+        new_alive = self._next_generation(counters)
+        entry = {
+            'generation': self.generation + 1,
+            'population': len(new_alive),
+            **counters,
+        }
+        if trace_memory:
+            entry['allocated_bytes'] = \
+                tracemalloc.get_traced_memory()[1] - memory_start
+        self.stats.record(entry)
+        return new_alive
 
     def _advance_cell(self, x, y):
         """Calculate the new state of a cell."""
@@ -130,3 +938,32 @@ class Life:
             return neighbors in self.survival
         else:
             return neighbors in self.birth
+
+
+def pattern_files(directory):
+    """Return the sorted names of the files in a directory of patterns.
+
+    Hidden files, subdirectories and anything else that is not a regular
+    file are skipped.
+    """
+    return [filename for filename in sorted(os.listdir(directory))
+            if not filename.startswith('.') and
+            os.path.isfile(os.path.join(directory, filename))]
+
+
+def load_patterns(directory):
+    """Load the patterns in a directory.
+
+    Returns a list of (filename, game) tuples, sorted by filename. Files
+    that cannot be read or that are not in a known pattern format are
+    skipped.
+    """
+    patterns = []
+    for filename in pattern_files(directory):
+        life = Life()
+        try:
+            life.load(os.path.join(directory, filename))
+        except (OSError, RuntimeError, ValueError):
+            continue
+        patterns.append((filename, life))
+    return patterns
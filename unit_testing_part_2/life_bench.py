@@ -0,0 +1,173 @@
+"""Benchmarks of the Life engines.
+
+Usage: python life_bench.py [--engines E1,E2] [--generations N]
+                            [--sizes 3,4,5] [--save FILE]
+                            [--compare FILE] [--threshold T]
+
+Every engine runs each pattern in the patterns directory and random soups
+of 10**size cells. Each case runs in a new process, so that its peak
+memory usage can be measured. With --compare, the run fails when a case is
+slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from life import Life, load_patterns
+import life_generate
+from life_packed import PackedCellList, PackedLife
+
+
+def _life_engine(alive, survival, birth):
+    life = Life(survival, birth)
+    life.alive = alive
+    return life
+
+
+def _packed_engine(alive, survival, birth):
+    life = PackedLife(survival, birth)
+    life.alive = PackedCellList.from_cells(alive)
+    return life
+
+
+# engine factories take a CellList and the rules, and return an object
+# with advance() and an alive attribute
+ENGINES = {
+    'celllist': _life_engine,
+    'packed': _packed_engine,
+}
+
+
+def _peak_rss():
+    """Return the peak resident memory of this process in kilobytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak
+
+
+def cases(directory='patterns', sizes=(3, 4, 5, 6, 7)):
+    """Return the names of the benchmark cases.
+
+    Only the pattern files that life.load_patterns() can load are
+    included, so that a broken file does not stop the run in a worker.
+    """
+    names = [f'pattern:{filename}'
+             for filename, life in load_patterns(directory)]
+    return names + [f'soup:{size}' for size in sizes]
+
+
+def _initial_cells(case, directory):
+    """Return the starting cells and rules of a benchmark case."""
+    kind, name = case.split(':', 1)
+    if kind == 'pattern':
+        life = Life()
+        life.load(os.path.join(directory, name))
+        return life.alive, life.survival, life.birth
+    side = math.isqrt(2 * 10 ** int(name))
+    return life_generate.soup(side, side, 0.5, seed=int(name)), [2, 3], [3]
+
+
+def run_case(engine, case, directory='patterns', generations=100,
+             max_time=10.0):
+    """Run a benchmark case and return its measurements.
+
+    The case runs for the given number of generations, or until max_time
+    seconds have passed, but always for at least one generation.
+    """
+    alive, survival, birth = _initial_cells(case, directory)
+    game = ENGINES[engine](alive, survival, birth)
+    cells = 0
+    done = 0
+    start = time.perf_counter()
+    while done < generations:
+        cells += len(game.alive)
+        game.advance()
+        done += 1
+        if time.perf_counter() - start > max_time:
+            break
+    elapsed = time.perf_counter() - start
+    return {
+        'generations': done,
+        'generations_per_second': done / elapsed,
+        'ns_per_cell': elapsed * 1e9 / cells if cells else None,
+        'peak_rss_kb': _peak_rss(),
+    }
+
+
+def _run_case(args):
+    return run_case(*args)
+
+
+def run(engines, case_names, directory='patterns', generations=100,
+        max_time=10.0):
+    """Run the benchmark cases of each engine, each in a new process."""
+    results = {}
+    for engine in engines:
+        for case in case_names:
+            with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+                result = pool.apply(_run_case, ((engine, case, directory,
+                                                 generations, max_time),))
+            results[f'{engine}/{case}'] = result
+            print(f'{engine:10s} {case:32s} '
+                  f'{result["generations_per_second"]:10.2f} gen/s '
+                  f'{result["ns_per_cell"] or 0:10.0f} ns/cell '
+                  f'{result["peak_rss_kb"] or 0:8d} KB', flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare results against a baseline.
+
+    Returns a list with a message for each case that runs fewer generations
+    per second than its baseline by more than the threshold fraction.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        expected = baseline[key]['generations_per_second']
+        actual = result['generations_per_second']
+        if actual < expected * (1 - threshold):
+            regressions.append(f'{key}: {actual:.2f} gen/s, baseline '
+                               f'{expected:.2f} gen/s '
+                               f'({actual / expected - 1:+.0%})')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engines', default=','.join(ENGINES))
+    parser.add_argument('--patterns', default='patterns')
+    parser.add_argument('--sizes', default='3,4,5,6,7')
+    parser.add_argument('--generations', type=int, default=100)
+    parser.add_argument('--max-time', type=float, default=10.0)
+    parser.add_argument('--save')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run(args.engines.split(','), cases(args.patterns, sizes),
+                  args.patterns, args.generations, args.max_time)
+    if args.save:
+        with open(args.save, 'wt') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, 'rt') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,140 @@
+"""Persistent cache of simulation results."""
+from array import array
+import collections
+import hashlib
+import mmap
+import os
+import struct
+
+from life import _normalize_with_offset, _pack
+
+# each record in the cache file has a key, the number of integers in its
+# packed cells, and the packed cells
+RECORD_HEADER = struct.Struct('=20sI')
+
+
+def cache_key(life, generations):
+    """Return the cache key for running a game for a number of generations.
+
+    The key does not depend on the position of the living cells. Returns
+    the key and the top-left corner of the bounding box of the cells, which
+    is the origin of the cached result.
+    """
+    minx, miny, shape = _normalize_with_offset(life.living_cells())
+    data = repr((life.rules_str(), generations, sorted(shape))).encode()
+    return hashlib.sha1(data).digest(), minx, miny
+
+
+class SimulationCache:
+    """Cache the results of running games for a number of generations.
+
+    Results are appended to a file that is memory-mapped for reading, so
+    they are reused across runs and can be shared by several processes.
+    Recently used results are also kept in memory, up to max_memory bytes,
+    and the least recently used ones are evicted first.
+    """
+
+    def __init__(self, path, max_memory=64 * 1024 * 1024):
+        self.path = path
+        self.max_memory = max_memory
+        self.memory = 0
+        self.index = {}
+        self.recent = collections.OrderedDict()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND |
+                           getattr(os, 'O_BINARY', 0))
+        self._map = None
+        self._scanned = 0
+        self._scan()
+
+    def close(self):
+        """Close the cache file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _scan(self):
+        """Index the records appended to the file since the last scan."""
+        size = os.fstat(self._fd).st_size
+        if size <= self._scanned:
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        offset = self._scanned
+        while offset + RECORD_HEADER.size <= size:
+            key, count = RECORD_HEADER.unpack_from(self._map, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + count * array('i').itemsize
+            if end > size:
+                # another process is still writing this record
+                break
+            self.index[key] = (start, end)
+            offset = end
+        self._scanned = offset
+
+    def _remember(self, key, packed):
+        """Keep a result in memory, evicting the least recently used."""
+        self.recent[key] = packed
+        self.memory += packed.itemsize * len(packed)
+        while self.memory > self.max_memory and len(self.recent) > 1:
+            _, evicted = self.recent.popitem(last=False)
+            self.memory -= evicted.itemsize * len(evicted)
+
+    def get(self, key):
+        """Return the packed cells stored under a key, or None."""
+        packed = self.recent.get(key)
+        if packed is not None:
+            self.recent.move_to_end(key)
+            return packed
+        if key not in self.index:
+            self._scan()
+            if key not in self.index:
+                return None
+        start, end = self.index[key]
+        packed = array('i')
+        packed.frombytes(self._map[start:end])
+        self._remember(key, packed)
+        return packed
+
+    def put(self, key, packed):
+        """Store packed cells under a key."""
+        # a single write to a file opened in append mode, so that records
+        # written by different processes do not get mixed
+        os.write(self._fd, RECORD_HEADER.pack(key, len(packed)) +
+                 packed.tobytes())
+        self._remember(key, packed)
+
+    def advance(self, life, generations):
+        """Advance a game by a number of generations.
+
+        The result is taken from the cache when the same cells, relative to
+        their bounding box, were already run with the same rules for the
+        same number of generations. Otherwise the game is advanced and the
+        result is stored in the cache.
+        """
+        key, minx, miny = cache_key(life, generations)
+        packed = self.get(key)
+        if packed is None:
+            for i in range(generations):
+                life.advance()
+            packed = _pack((x - minx, y - miny)
+                           for x, y in life.living_cells())
+            self.put(key, packed)
+            return
+        rows = collections.defaultdict(list)
+        for x, y in zip(packed[::2], packed[1::2]):
+            rows[y + miny].append(x + minx)
+        alive = type(life.alive)()
+        alive.add_rows(rows)
+        life.alive = alive
+        life.generation += generations
+        life._edited()
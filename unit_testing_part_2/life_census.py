@@ -0,0 +1,175 @@
+"""Census of the objects that remain after running random soups.
+
+Usage: python life_census.py [--soups N] [--seed S] [--workers W]
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import time
+
+from life import canonical, _normalize, load_patterns
+import life_generate
+from life_packed import PackedCellList, PackedLife
+
+SOUP_SIZE = 16
+MAX_GENERATIONS = 5000
+MAX_PERIOD = 30
+
+
+def soup(seed, size=SOUP_SIZE, density=0.5, survival=[2, 3], birth=[3]):
+    """Return a game with a random square soup generated from a seed."""
+    life = PackedLife(survival, birth)
+    life.alive = PackedCellList.from_cells(
+        life_generate.soup(size, size, density, seed))
+    return life
+
+
+def stabilize(life, max_generations=MAX_GENERATIONS, max_period=MAX_PERIOD):
+    """Advance a game until its population becomes periodic.
+
+    The game is stable as soon as the grid repeats itself with a period of
+    up to max_period. Escaping spaceships keep the grid from ever repeating
+    exactly, so the population is checked too: the game is also considered
+    stable when the population has repeated with a period of up to
+    max_period for three times max_period generations. Returns the number
+    of generations that were run, or None if the game did not stabilize.
+    """
+    window = 3 * max_period
+    # the grids and populations of the last max_period generations
+    grids = collections.deque(maxlen=max_period)
+    populations = collections.deque(maxlen=max_period)
+    # runs[period - 1] is the number of consecutive generations that had the
+    # same population as period generations before
+    runs = [0] * max_period
+    for generation in range(max_generations + 1):
+        population = len(life.alive)
+        for period, previous in enumerate(reversed(populations), 1):
+            if previous != population:
+                runs[period - 1] = 0
+            elif runs[period - 1] + 1 >= window or \
+                    grids[-period] == life.alive:
+                return generation
+            else:
+                runs[period - 1] += 1
+        grids.append(life.alive)
+        populations.append(population)
+        life.advance()
+    return None
+
+
+def object_key(cells, survival=[2, 3], birth=[3], max_period=MAX_PERIOD):
+    """Return the canonical key of an object, independent of its phase.
+
+    The object is run in isolation until it repeats, and the smallest
+    canonical key of all its phases is returned. Objects that do not repeat
+    within max_period generations use the key of their current phase.
+    """
+    life = PackedLife(survival, birth)
+    life.alive = PackedCellList.from_cells(cells)
+    initial = _normalize(cells)
+    keys = []
+    for generation in range(max_period):
+        keys.append(canonical(life.living_cells()))
+        life.advance()
+        if _normalize(life.living_cells()) == initial:
+            return min(keys)
+    return keys[0]
+
+
+def census(life, max_period=MAX_PERIOD):
+    """Count the objects in a game.
+
+    Returns a Counter with the number of objects of each canonical key and
+    a dictionary with a sample of the cells of each object.
+    """
+    counts = collections.Counter()
+    samples = {}
+    for obj in life.objects():
+        key = object_key(obj, life.survival, life.birth, max_period)
+        counts[key] += 1
+        samples.setdefault(key, sorted(_normalize(obj)))
+    return counts, samples
+
+
+def run_soups(seeds, size=SOUP_SIZE, density=0.5):
+    """Run a group of soups and merge their censuses."""
+    counts = collections.Counter()
+    samples = {}
+    unstable = 0
+    for seed in seeds:
+        life = soup(seed, size, density)
+        if stabilize(life) is None:
+            unstable += 1
+            continue
+        soup_counts, soup_samples = census(life)
+        counts.update(soup_counts)
+        for key, sample in soup_samples.items():
+            samples.setdefault(key, sample)
+    return counts, samples, unstable
+
+
+def _run_chunk(args):
+    return run_soups(*args)
+
+
+def parallel_census(soups, seed=0, size=SOUP_SIZE, density=0.5,
+                    workers=None, chunk_size=50):
+    """Run a census of many soups across a pool of worker processes.
+
+    Soup n is generated from seed + n, so the results do not depend on the
+    number of workers.
+    """
+    chunks = [(range(start, min(start + chunk_size, seed + soups)),
+               size, density)
+              for start in range(seed, seed + soups, chunk_size)]
+    counts = collections.Counter()
+    samples = {}
+    unstable = 0
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_counts, chunk_samples, chunk_unstable in \
+                pool.imap_unordered(_run_chunk, chunks):
+            counts.update(chunk_counts)
+            for key, sample in chunk_samples.items():
+                samples.setdefault(key, sample)
+            unstable += chunk_unstable
+    return counts, samples, unstable
+
+
+def known_objects(directory):
+    """Return a dictionary that maps object keys to pattern names.
+
+    Only the pattern files that contain a single object are included.
+    """
+    names = {}
+    for filename, life in load_patterns(directory):
+        objects = life.objects()
+        if len(objects) == 1:
+            key = object_key(objects[0], life.survival, life.birth)
+            names.setdefault(key, os.path.splitext(filename)[0])
+    return names
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--soups', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--size', type=int, default=SOUP_SIZE)
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--patterns', default='patterns')
+    args = parser.parse_args()
+
+    names = known_objects(args.patterns)
+    start = time.perf_counter()
+    counts, samples, unstable = parallel_census(
+        args.soups, args.seed, args.size, args.density, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f'{args.soups} soups in {elapsed:.1f}s '
+          f'({args.soups / elapsed:.1f} soups/s), {unstable} unstable')
+    for key, count in counts.most_common():
+        cells = samples[key]
+        width = max(x for x, y in cells) + 1
+        height = max(y for x, y in cells) + 1
+        print(f'{count:8d}  {key}  {len(cells):4d} cells  '
+              f'{width}x{height}  {names.get(key, "")}')
@@ -0,0 +1,84 @@
+"""Generate random soups and tiled patterns.
+
+Random numbers come from counter-based Philox streams keyed by a seed and
+a stream number. Each square tile of a soup uses its own stream, so any
+part of a board can be generated independently and reproducibly, in any
+process and in any order.
+"""
+import multiprocessing
+
+import numpy as np
+
+from life import CellList, Life
+
+TILE_SIZE = 256
+
+
+def _rng(seed, stream):
+    """Return a random generator for a stream of a seed."""
+    return np.random.Generator(np.random.Philox(key=(stream << 64) | seed))
+
+
+def _soup_band(args):
+    """Generate the rows of a horizontal band of tiles of a soup."""
+    width, height, density, seed, tile_y, tile_size = args
+    threshold = np.uint64(round(density * (1 << 32)))
+    top = tile_y * tile_size
+    band = np.empty((min(tile_size, height - top), width), dtype=bool)
+    for tile_x in range(0, (width + tile_size - 1) // tile_size):
+        left = tile_x * tile_size
+        tile = band[:, left:left + tile_size]
+        stream = (tile_y << 32) | tile_x
+        tile[:] = _rng(seed, stream).integers(
+            1 << 32, size=tile.shape, dtype=np.uint32) < threshold
+    return top, [np.flatnonzero(row).tolist() for row in band]
+
+
+def soup(width, height, density=0.5, seed=0, x=0, y=0, workers=1,
+         tile_size=TILE_SIZE):
+    """Return a CellList with a random soup.
+
+    The soup covers width x height cells starting at (x, y), and each cell
+    is alive with the given probability. The same arguments always give
+    the same soup, regardless of the number of worker processes that
+    generate it.
+    """
+    bands = [(width, height, density, seed, tile_y, tile_size)
+             for tile_y in range((height + tile_size - 1) // tile_size)]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_soup_band, bands)
+    else:
+        results = map(_soup_band, bands)
+    alive = CellList()
+    for top, rows in results:
+        alive.add_rows({y + top + i: [x + cx for cx in xs] if x else xs
+                        for i, xs in enumerate(rows) if xs})
+    return alive
+
+
+def tiled(pattern, columns, rows, gap=2, x=0, y=0):
+    """Return a CellList with copies of a pattern arranged in a grid.
+
+    The pattern can be a Life game, a CellList or any iterable of (x, y)
+    cells. Copies are separated by gap dead cells, and the top-left corner
+    of the first copy is at (x, y).
+    """
+    if isinstance(pattern, Life):
+        pattern = pattern.alive
+    pattern_rows = {}
+    for cx, cy in pattern:
+        pattern_rows.setdefault(cy, []).append(cx)
+    if not pattern_rows:
+        return CellList()
+    minx = min(min(xs) for xs in pattern_rows.values())
+    miny = min(pattern_rows)
+    width = max(max(xs) for xs in pattern_rows.values()) - minx + 1 + gap
+    height = max(pattern_rows) - miny + 1 + gap
+
+    alive = CellList()
+    for cy, xs in pattern_rows.items():
+        row = [cx - minx + x + i * width for i in range(columns) for cx in xs]
+        alive.add_rows({cy - miny + y + j * height: row
+                        for j in range(rows)})
+    return alive
@@ -1,13 +1,500 @@
+import collections
+import os
+import queue
 import sys
+import threading
+import time
+import numpy as np
 import pygame
-from life import Life
+from life import Life, _normalize, load_patterns
+from life_record import BACKGROUND_COLOR, CELL_COLOR, GRID_COLOR
 
 SCREEN_SIZE = 500
 FPS = 5
+RENDER_FPS = 30
+# limits of the target generations per second
+MIN_RATE = 0.5
+MAX_RATE = 1000
+
+# pixels that are transparent in the grid overlay
+TRANSPARENT_COLOR = (255, 0, 255)
+
+# state of a cell in the previous grid of the renderer when its pixels on
+# the screen are not known
+UNKNOWN = 2
+
+# pixels per cell at each zoom level, at 1 and below each pixel shows the
+# density of the cells it covers
+ZOOM_LEVELS = [1 / 64, 1 / 32, 1 / 16, 1 / 8, 1 / 4, 1 / 2, 1,
+               10, 15, 20, 25, 30, 35, 40, 45, 50]
 
 life = Life()
 
 
+class Renderer:
+    """Draw the game grid with a few blits instead of one call per cell.
+
+    The visible cells are written to a NumPy array with one pixel per cell,
+    which is scaled up to the size of the cells. The grid lines and the
+    margins around the cells are drawn over it from an overlay surface that
+    is rendered once for each scale.
+
+    Once the screen has been drawn, only the cells that changed since the
+    previous frame are repainted, and nothing is drawn when the grid and
+    the view did not change. When the view is panned, the screen is
+    scrolled, and only the cells that it uncovers or that changed are
+    drawn.
+
+    At scales of one pixel per cell or less, each pixel is drawn with a
+    shade of the cell color that shows how many of the cells it covers are
+    alive.
+    """
+    # above this fraction of changed cells the whole screen is redrawn
+    FULL_REDRAW = 0.25
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.palette = np.array([BACKGROUND_COLOR, CELL_COLOR],
+                                dtype=np.uint8)
+        shades = np.linspace(0, 1, 256)[:, np.newaxis]
+        self.shades = np.round(
+            np.array(BACKGROUND_COLOR) * (1 - shades) +
+            np.array(CELL_COLOR) * shades).astype(np.uint8)
+        self.overlays = {}
+        self.alive = None
+        self.view = None
+        self.grid = None
+        # scrolling moves anything else that was drawn on the screen, so it
+        # can be turned off
+        self.scroll = True
+
+    def invalidate(self):
+        """Redraw the whole screen on the next frame."""
+        self.view = None
+
+    def changed(self, alive, basex, basey, scale):
+        """Check if draw() would modify the screen."""
+        return alive is not self.alive or (basex, basey, scale) != self.view
+
+    def overlay(self, scale):
+        """Return the grid overlay for a scale."""
+        if scale not in self.overlays:
+            overlay = pygame.Surface((SCREEN_SIZE, SCREEN_SIZE))
+            overlay.fill(TRANSPARENT_COLOR)
+            for i in range(0, SCREEN_SIZE, scale):
+                for margin in (i + 1, i + scale - 1):
+                    pygame.draw.line(overlay, BACKGROUND_COLOR,
+                                     (margin, 0), (margin, SCREEN_SIZE))
+                    pygame.draw.line(overlay, BACKGROUND_COLOR,
+                                     (0, margin), (SCREEN_SIZE, margin))
+            for i in range(0, SCREEN_SIZE, scale):
+                pygame.draw.line(overlay, GRID_COLOR, (i, 0), (i, SCREEN_SIZE))
+                pygame.draw.line(overlay, GRID_COLOR, (0, i), (SCREEN_SIZE, i))
+            overlay.set_colorkey(TRANSPARENT_COLOR)
+            self.overlays[scale] = overlay.convert()
+        return self.overlays[scale]
+
+    def visible_cells(self, alive, basex, basey, scale):
+        """Return an array with a 1 for each living cell on the screen.
+
+        The array is indexed by [x, y], like the arrays of pygame.surfarray.
+        """
+        count = -(-SCREEN_SIZE // scale)
+        grid = np.zeros((count, count), dtype=np.uint8)
+        visible = alive.query(basex, basey, basex + count, basey + count)
+        cells = np.asarray(visible.as_array()).reshape(-1, 2)
+        grid[cells[:, 0] - basex, cells[:, 1] - basey] = 1
+        return grid
+
+    def density(self, alive, basex, basey, block, width=SCREEN_SIZE,
+                height=SCREEN_SIZE):
+        """Return an array with the shade of each pixel in an area.
+
+        Each pixel covers a square of block by block cells. The cells are
+        counted with NumPy from the cached cell buffer of the grid, which is
+        built once for each generation, without iterating over them in
+        Python. Pixels with at least one living cell get a quarter of the
+        full shade or more, so that sparse objects stay visible.
+        """
+        cells = np.asarray(alive.as_array()).reshape(-1, 2)
+        xs = cells[:, 0] - basex
+        ys = cells[:, 1] - basey
+        inside = (xs >= 0) & (xs < width * block) & (ys >= 0) & \
+            (ys < height * block)
+        counts = np.bincount(xs[inside] // block * height +
+                             ys[inside] // block, minlength=width * height)
+        shades = np.where(counts > 0, 64 + 191 * counts // (block * block), 0)
+        return shades.reshape(width, height)
+
+    def draw(self, alive, basex, basey, scale):
+        """Draw a grid with its top-left cell at (basex, basey).
+
+        Returns the list of rectangles of the screen that were modified.
+        """
+        # frames are never modified, so the same frame means that no cells
+        # changed
+        view = (basex, basey, scale)
+        if alive is self.alive and view == self.view:
+            return []
+        old_alive, old_view = self.alive, self.view
+        self.alive = alive
+        self.view = view
+        dx = dy = None
+        if self.scroll and old_view is not None and old_view[2] == scale:
+            dx, dy = basex - old_view[0], basey - old_view[1]
+
+        if scale <= 1:
+            self.grid = None
+            block = round(1 / scale)
+            if alive is old_alive and dx is not None and \
+                    dx % block == 0 and dy % block == 0:
+                return self._scroll_density(alive, basex, basey, block,
+                                            dx // block, dy // block)
+            shades = self.density(alive, basex, basey, block)
+            surface = pygame.surfarray.make_surface(self.shades[shades])
+            self.screen.blit(surface, (0, 0))
+            return [self.screen.get_rect()]
+
+        grid = self.visible_cells(alive, basex, basey, scale)
+        previous, self.grid = self.grid, grid
+        scrolled = False
+        if previous is None or dx is None:
+            previous = None
+        elif dx or dy:
+            count = grid.shape[0]
+            if abs(dx) < count and abs(dy) < count:
+                # the grid lines repeat every cell, so they are still in
+                # place after the screen is scrolled by whole cells, and
+                # only the cells that differ from what is on the screen
+                # need to be repainted
+                self.screen.scroll(-dx * scale, -dy * scale)
+                previous = _scrolled(previous, dx, dy, scale)
+                scrolled = True
+            else:
+                previous = None
+
+        if previous is not None:
+            xs, ys = np.nonzero(grid != previous)
+            if len(xs) <= self.FULL_REDRAW * grid.size:
+                rects = []
+                for x, y, alive in zip(xs.tolist(), ys.tolist(),
+                                       grid[xs, ys].tolist()):
+                    rects.append(self.screen.fill(
+                        self.palette[alive],
+                        (x * scale + 2, y * scale + 2, scale - 3, scale - 3)))
+                if scrolled:
+                    return [self.screen.get_rect()]
+                return rects
+
+        surface = pygame.surfarray.make_surface(self.palette[grid])
+        size = grid.shape[0] * scale
+        self.screen.blit(pygame.transform.scale(surface, (size, size)),
+                         (0, 0))
+        self.screen.blit(self.overlay(scale), (0, 0))
+        return [self.screen.get_rect()]
+
+    def _scroll_density(self, alive, basex, basey, block, dx, dy):
+        """Scroll the density map by (dx, dy) pixels and draw the new strips.
+        """
+        if dx or dy:
+            self.screen.scroll(-dx, -dy)
+        strips = []
+        if dx > 0:
+            strips.append((SCREEN_SIZE - dx, 0, dx, SCREEN_SIZE))
+        elif dx < 0:
+            strips.append((0, 0, -dx, SCREEN_SIZE))
+        if dy > 0:
+            strips.append((0, SCREEN_SIZE - dy, SCREEN_SIZE, dy))
+        elif dy < 0:
+            strips.append((0, 0, SCREEN_SIZE, -dy))
+        for left, top, width, height in strips:
+            width = min(width, SCREEN_SIZE)
+            height = min(height, SCREEN_SIZE)
+            shades = self.density(alive, basex + left * block,
+                                  basey + top * block, block, width, height)
+            surface = pygame.surfarray.make_surface(self.shades[shades])
+            self.screen.blit(surface, (left, top))
+        return [self.screen.get_rect()]
+
+
+def _scrolled(grid, dx, dy, scale):
+    """Return what a grid looks like after the screen is scrolled.
+
+    The screen is scrolled so that each cell shows the cell that was dx, dy
+    cells away from it. Surface.scroll() leaves the pixels that are
+    uncovered unchanged, so those cells keep their previous state.
+
+    When the last cell is only partly on the screen, the cell that it is
+    scrolled into is left with some of its old pixels, so its state is
+    marked as unknown, and it is always repainted.
+    """
+    result = grid.copy()
+    width, height = grid.shape
+    result[max(0, -dx):min(width, width - dx),
+           max(0, -dy):min(height, height - dy)] = \
+        grid[max(0, dx):min(width, width + dx),
+             max(0, dy):min(height, height + dy)]
+    if SCREEN_SIZE % scale:
+        if 0 < dx < width:
+            result[width - 1 - dx, :] = UNKNOWN
+        if 0 < dy < height:
+            result[:, height - 1 - dy] = UNKNOWN
+    return result
+
+
+class Simulation(threading.Thread):
+    """Advance the game in a background thread.
+
+    Generations are published as (generation, cells) frames to a bounded
+    queue, where the oldest frame is dropped when the queue is full, so the
+    simulation never waits for the screen. The cells of a frame are a copy
+    of the grid that is not modified afterwards. Edits are functions that
+    are called with the game between two generations.
+
+    The game advances rate times per second, starting at FPS. When a
+    generation takes longer than that, the next one starts right away
+    without trying to catch up. In turbo mode the game advances as fast as
+    it can and only every TURBO_STEP generations is published. The time
+    taken by each generation is tracked in advance_time, as a moving
+    average in seconds.
+    """
+    TURBO_STEP = 10
+
+    def __init__(self, life, queue_size=4):
+        super().__init__(daemon=True)
+        self.life = life
+        self.frames = queue.Queue(queue_size)
+        self.edits = queue.Queue()
+        self.paused = False
+        self.turbo = False
+        self.stopped = False
+        self.rate = FPS
+        self.advance_time = 0
+
+    def edit(self, function):
+        """Call a function with the game between two generations."""
+        self.edits.put(function)
+
+    def set_paused(self, paused):
+        """Pause or resume the simulation."""
+        self.paused = paused
+        self.edits.put(None)
+
+    def set_turbo(self, turbo):
+        """Turn the turbo mode on or off."""
+        self.turbo = turbo
+        self.edits.put(None)
+
+    def set_rate(self, rate):
+        """Set the target number of generations per second."""
+        self.rate = rate
+        self.edits.put(None)
+
+    def stop(self):
+        """Stop the thread and wait for it to end."""
+        self.stopped = True
+        self.edits.put(None)
+        self.join()
+
+    def latest(self):
+        """Return the newest published frame, or None if there is none."""
+        frame = None
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                return frame
+
+    def _publish(self):
+        frame = (self.life.generation, self.life.alive.copy())
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        self._publish()
+        next_time = time.monotonic()
+        while not self.stopped:
+            if self.paused:
+                timeout = None
+            elif self.turbo:
+                timeout = 0
+            else:
+                timeout = max(0, next_time - time.monotonic())
+            try:
+                edit = self.edits.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                # apply all the pending edits at once
+                edited = False
+                while True:
+                    if edit is not None:
+                        edit(self.life)
+                        edited = True
+                    try:
+                        edit = self.edits.get_nowait()
+                    except queue.Empty:
+                        break
+                if edited:
+                    self._publish()
+                continue
+
+            start = time.perf_counter()
+            self.life.advance()
+            self.advance_time += (time.perf_counter() - start -
+                                  self.advance_time) * 0.1
+            next_time = max(next_time + 1 / self.rate, time.monotonic())
+            if not self.turbo or self.life.generation % self.TURBO_STEP == 0:
+                self._publish()
+
+
+class StatsOverlay:
+    """Show performance statistics in the top-left corner of the screen.
+
+    The achieved frames and generations per second are measured over the
+    last second. The statistics are redrawn twice per second, or with every
+    frame that changed the screen.
+    """
+    INTERVAL = 0.5
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.font = pygame.font.Font(None, 20)
+        self.frames = collections.deque()
+        self.render_time = 0
+        self.last_draw = 0
+
+    def frame(self, generation, render_time):
+        """Record a frame that changed the screen."""
+        now = time.monotonic()
+        self.frames.append((now, generation))
+        while self.frames[0][0] < now - 1:
+            self.frames.popleft()
+        self.render_time += (render_time - self.render_time) * 0.1
+
+    def draw(self, generation, population, simulation, force=False):
+        """Draw the statistics and return their rectangle.
+
+        Returns None when the statistics were drawn less than INTERVAL
+        seconds ago, unless force is set.
+        """
+        now = time.monotonic()
+        if not force and now - self.last_draw < self.INTERVAL:
+            return None
+        self.last_draw = now
+        while self.frames and self.frames[0][0] < now - 1:
+            self.frames.popleft()
+        fps = len(self.frames)
+        rate = 0
+        if len(self.frames) > 1:
+            rate = (self.frames[-1][1] - self.frames[0][1]) / \
+                max(self.frames[-1][0] - self.frames[0][0], 1e-3)
+        target = 'max' if simulation.turbo else f'{simulation.rate:g}'
+        lines = [
+            f'generation {generation}  population {population}',
+            f'advance {simulation.advance_time * 1000:.1f} ms  '
+            f'render {self.render_time * 1000:.1f} ms',
+            f'{fps} fps  {rate:.1f} gen/s (target {target})',
+        ]
+        texts = [self.font.render(line, True, GRID_COLOR) for line in lines]
+        rect = pygame.Rect(0, 0, max(text.get_width() for text in texts) + 8,
+                           sum(text.get_height() for text in texts) + 8)
+        # wide enough for longer statistics, so that the previous text is
+        # always covered
+        rect.width = max(rect.width, SCREEN_SIZE * 3 // 5)
+        self.screen.fill(BACKGROUND_COLOR, rect)
+        pygame.draw.rect(self.screen, GRID_COLOR, rect, 1)
+        y = 4
+        for text in texts:
+            self.screen.blit(text, (4, y))
+            y += text.get_height()
+        return rect
+
+
+def load_palette(directory='patterns'):
+    """Return a list of (name, cells) tuples with the patterns in a directory.
+
+    The cells of each pattern are an (N, 2) array, shifted so that their
+    bounding box starts at (0, 0). The files are loaded with
+    life.load_patterns().
+    """
+    palette = []
+    for filename, pattern in load_patterns(directory):
+        cells = np.array(sorted(_normalize(pattern.living_cells())),
+                         dtype=np.int32).reshape(-1, 2)
+        if len(cells):
+            palette.append((os.path.splitext(filename)[0], cells))
+    return palette
+
+
+class StampPreview:
+    """Show a pattern under the mouse before it is placed.
+
+    Only the part of the pattern that is on the screen is drawn, so the
+    cost of moving the preview does not depend on the size of the pattern.
+    The pixels under the preview are saved, so that it can be hidden again
+    without redrawing the grid.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.saved = None
+        self.key = None
+
+    def hide(self):
+        """Remove the preview and return the rectangle it covered."""
+        self.key = None
+        if self.saved is None:
+            return None
+        rect, pixels = self.saved
+        self.saved = None
+        self.screen.blit(pixels, rect)
+        return rect
+
+    def show(self, cells, x, y, basex, basey, scale):
+        """Draw the cells of a pattern with its origin at cell (x, y).
+
+        Returns the rectangle covered by the preview, or None if the
+        pattern is not on the screen.
+        """
+        block = round(1 / scale) if scale <= 1 else 1
+        cell_size = max(scale, 1)
+        count = -(-SCREEN_SIZE // cell_size)
+        # position of each cell of the pattern on the screen, in cells, or
+        # in pixels when they are smaller than a pixel
+        xs = (cells[:, 0] + x - basex) // block
+        ys = (cells[:, 1] + y - basey) // block
+        inside = (xs >= 0) & (xs < count) & (ys >= 0) & (ys < count)
+        if not inside.any():
+            return None
+        xs, ys = xs[inside], ys[inside]
+        left, top = int(xs.min()), int(ys.min())
+        grid = np.zeros((int(xs.max()) - left + 1, int(ys.max()) - top + 1),
+                        dtype=bool)
+        grid[xs - left, ys - top] = True
+
+        pixels = np.where(grid[:, :, np.newaxis], np.uint8(CELL_COLOR),
+                          np.uint8(TRANSPARENT_COLOR))
+        surface = pygame.surfarray.make_surface(pixels)
+        if cell_size > 1:
+            size = (grid.shape[0] * cell_size, grid.shape[1] * cell_size)
+            surface = pygame.transform.scale(surface, size)
+        surface.set_colorkey(TRANSPARENT_COLOR)
+        surface.set_alpha(160)
+        rect = surface.get_rect(topleft=(left * cell_size, top * cell_size))
+        rect = rect.clip(self.screen.get_rect())
+        self.saved = (rect, self.screen.subsurface(rect).copy())
+        self.screen.blit(surface, (left * cell_size, top * cell_size))
+        return rect
+
+
 def initialize_game(pattern_file=None):
     pygame.init()
     screen = pygame.display.set_mode([SCREEN_SIZE, SCREEN_SIZE])
@@ -19,86 +506,221 @@ def initialize_game(pattern_file=None):
     return screen
 
 
-def center(scale):
-    cell_count = SCREEN_SIZE // scale
-    minx, miny, maxx, maxy = life.bounding_box()
+def center(scale, cells):
+    cell_count = int(SCREEN_SIZE // scale)
+    cells = np.asarray(cells.as_array()).reshape(-1, 2)
+    if len(cells):
+        minx, miny = cells.min(axis=0).tolist()
+        maxx, maxy = cells.max(axis=0).tolist()
+    else:
+        minx = miny = maxx = maxy = 0
 
     basex = minx - (cell_count - (maxx - minx + 1)) // 2
     basey = miny - (cell_count - (maxy - miny + 1)) // 2
     return basex, basey
 
 
+def line_cells(x0, y0, x1, y1):
+    """Return the cells of a line between two cells, with Bresenham's
+    algorithm.
+    """
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    error = dx + dy
+    cells = [(x0, y0)]
+    while (x0, y0) != (x1, y1):
+        double_error = 2 * error
+        if double_error >= dy:
+            error += dy
+            x0 += sx
+        if double_error <= dx:
+            error += dx
+            y0 += sy
+        cells.append((x0, y0))
+    return cells
+
+
+def stamp_origin(stamp, position, basex, basey, scale):
+    """Return where to place a pattern to center it on a mouse position."""
+    mx, my = position
+    return (int(mx // scale) + basex - int(stamp[:, 0].max()) // 2,
+            int(my // scale) + basey - int(stamp[:, 1].max()) // 2)
+
+
+def caption(paused, turbo, stamp=None):
+    if paused:
+        text = 'Game of Life (paused)'
+    elif turbo:
+        text = f'Game of Life [{life.rules_str()}] (turbo)'
+    else:
+        text = f'Game of Life [{life.rules_str()}]'
+    if stamp is not None:
+        text += f' - placing {stamp}'
+    return text
+
+
 def game_loop(screen):
     running = True
     paused = False
-    scale = 20
-    basex, basey = center(scale)
-    interval = 1000 // FPS
+    turbo = False
+    show_stats = False
+    zoom = ZOOM_LEVELS.index(20)
+    scale = ZOOM_LEVELS[zoom]
+    simulation = Simulation(life)
+    simulation.start()
+    generation, cells = simulation.frames.get()
+    basex, basey = center(scale, cells)
+    renderer = Renderer(screen)
+    stats = StatsOverlay(screen)
+    palette = load_palette()
+    selected = None
+    stamp_name = None
+    preview = StampPreview(screen)
+    # cells painted with the mouse during a drag, in order
+    stroke = None
+    clock = pygame.time.Clock()
 
     while running:
-        start_time = pygame.time.get_ticks()
-
-        screen.fill((255, 255, 255))
-        for i in range(0, SCREEN_SIZE, scale):
-            pygame.draw.line(screen, (0, 0, 0), (i, 0), (i, SCREEN_SIZE))
-            pygame.draw.line(screen, (0, 0, 0), (0, i), (SCREEN_SIZE, i))
-        for cell in life.alive:
-            x = cell[0]
-            y = cell[1]
-            pygame.draw.rect(screen, (80, 80, 192),
-                             ((x - basex) * scale + 2, (y - basey) * scale + 2,
-                              scale - 3, scale - 3))
-
-        pygame.display.flip()
-        if not paused:
-            life.advance()
-
-        wait_time = 1
-        while wait_time > 0:
-            event = pygame.event.wait(timeout=wait_time)
-            while event:
-                if event.type == pygame.QUIT:
+        frame = simulation.latest()
+        if frame is not None:
+            generation, cells = frame
+        rects = []
+        preview_key = None
+        if stroke is not None and len(stroke) > 1:
+            preview_key = ('stroke', len(stroke), basex, basey, scale)
+        elif selected is not None:
+            stamp = palette[selected][1]
+            stamp_x, stamp_y = stamp_origin(stamp, pygame.mouse.get_pos(),
+                                            basex, basey, scale)
+            preview_key = (selected, stamp_x, stamp_y, basex, basey, scale)
+        update_preview = preview_key != preview.key or \
+            (preview.key is not None and
+             renderer.changed(cells, basex, basey, scale))
+        if update_preview:
+            # the grid is redrawn under the preview before it moves
+            rect = preview.hide()
+            if rect:
+                rects.append(rect)
+        start = time.perf_counter()
+        drawn = renderer.draw(cells, basex, basey, scale)
+        if drawn:
+            stats.frame(generation, time.perf_counter() - start)
+            rects += drawn
+        if update_preview and preview_key is not None:
+            preview.key = preview_key
+            if preview_key[0] == 'stroke':
+                rect = preview.show(np.array(stroke, dtype=np.int32), 0, 0,
+                                    basex, basey, scale)
+            else:
+                rect = preview.show(stamp, stamp_x, stamp_y, basex, basey,
+                                    scale)
+            if rect:
+                rects.append(rect)
+        if show_stats:
+            rect = stats.draw(generation, len(cells), simulation,
+                              force=bool(rects))
+            if rect:
+                rects.append(rect)
+        if rects:
+            pygame.display.update(rects)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
                     running = False
-                    break
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    elif event.key == pygame.K_LEFT:
-                        basex -= 2
-                    elif event.key == pygame.K_RIGHT:
-                        basex += 2
-                    elif event.key == pygame.K_UP:
-                        basey -= 2
-                    elif event.key == pygame.K_DOWN:
-                        basey += 2
-                    elif event.unicode == ' ':
-                        paused = not paused
-                        if paused:
-                            pygame.display.set_caption('Game of Life (paused)')
-                        else:
-                            pygame.display.set_caption(
-                                f'Game of Life [{life.rules_str()}]')
-                    elif event.unicode == '+':
-                        if scale < 50:
-                            scale += 5
-                    elif event.unicode == '-':
-                        if scale > 10:
-                            scale -= 5
-                    elif event.unicode == 'c':
-                        basex, basey = center(scale)
-                    break
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    mx, my = pygame.mouse.get_pos()
-                    x = mx // scale + basex
-                    y = my // scale + basey
-                    life.toggle(x, y)
-                    break
-                event = pygame.event.poll()
-            if event:
-                break
-
-            current_time = pygame.time.get_ticks()
-            wait_time = interval - (current_time - start_time)
+                elif event.key == pygame.K_LEFT:
+                    basex -= max(2, int(20 // scale))
+                elif event.key == pygame.K_RIGHT:
+                    basex += max(2, int(20 // scale))
+                elif event.key == pygame.K_UP:
+                    basey -= max(2, int(20 // scale))
+                elif event.key == pygame.K_DOWN:
+                    basey += max(2, int(20 // scale))
+                elif event.unicode == ' ':
+                    paused = not paused
+                    simulation.set_paused(paused)
+                    pygame.display.set_caption(
+                        caption(paused, turbo, stamp_name))
+                elif event.unicode == 't':
+                    turbo = not turbo
+                    simulation.set_turbo(turbo)
+                    pygame.display.set_caption(
+                        caption(paused, turbo, stamp_name))
+                elif event.unicode == ']':
+                    simulation.set_rate(min(simulation.rate * 2, MAX_RATE))
+                elif event.unicode == '[':
+                    simulation.set_rate(max(simulation.rate / 2, MIN_RATE))
+                elif event.unicode == 'o':
+                    show_stats = not show_stats
+                    renderer.scroll = not show_stats
+                    # uncover the cells under the statistics
+                    renderer.invalidate()
+                elif event.unicode == '+':
+                    if zoom < len(ZOOM_LEVELS) - 1:
+                        zoom += 1
+                        scale = ZOOM_LEVELS[zoom]
+                elif event.unicode == '-':
+                    if zoom > 0:
+                        zoom -= 1
+                        scale = ZOOM_LEVELS[zoom]
+                elif event.unicode == 'c':
+                    basex, basey = center(scale, cells)
+                elif event.unicode in ('p', 'P') and palette:
+                    # cycle through the patterns, and back to toggling cells
+                    step = 1 if event.unicode == 'p' else -1
+                    index = len(palette) if selected is None else selected
+                    index = (index + step) % (len(palette) + 1)
+                    selected = None if index == len(palette) else index
+                    stamp_name = None if selected is None else \
+                        palette[selected][0]
+                    pygame.display.set_caption(caption(paused, turbo,
+                                                       stamp_name))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1 and selected is None:
+                    mx, my = event.pos
+                    last_cell = (int(mx // scale) + basex,
+                                 int(my // scale) + basey)
+                    stroke = [last_cell]
+                    painted = set(stroke)
+            elif event.type == pygame.MOUSEMOTION:
+                if stroke is not None:
+                    # fast drags move several cells between two events, so
+                    # the cells in between are painted too
+                    mx, my = event.pos
+                    target = (int(mx // scale) + basex,
+                              int(my // scale) + basey)
+                    for cell in line_cells(*last_cell, *target):
+                        if cell not in painted:
+                            painted.add(cell)
+                            stroke.append(cell)
+                    last_cell = target
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                if selected is not None:
+                    stamp = palette[selected][1]
+                    x, y = stamp_origin(stamp, event.pos, basex, basey, scale)
+                    simulation.edit(lambda life, stamp=stamp, x=x, y=y:
+                                    life.place(stamp.tolist(), x, y))
+                elif stroke is not None and len(stroke) > 1:
+                    # all the painted cells are added at once between two
+                    # generations
+                    simulation.edit(lambda life, cells=stroke:
+                                    life.place(cells, 0, 0))
+                else:
+                    mx, my = event.pos
+                    x = int(mx // scale) + basex
+                    y = int(my // scale) + basey
+                    simulation.edit(lambda life, x=x, y=y: life.toggle(x, y))
+                stroke = None
+
+        # waits for the rest of the frame, or not at all when the frame
+        # took longer than that
+        clock.tick(RENDER_FPS)
+
+    simulation.stop()
 
 
 if __name__ == '__main__':
@@ -108,8 +730,13 @@ if __name__ == '__main__':
 Press: Arrows to scroll
        Space to pause/resume the simulation
        +/- to zoom in/out
+       t to turn the turbo mode on/off
+       [/] to halve/double the generations per second
+       o to show/hide the performance statistics
+       p/P to select the next/previous pattern to place with the mouse
        c to re-center
        mouse click to toggle the state of a cell
+       mouse drag to paint living cells
        Esc to exit''')
     game_loop(screen)
     pygame.quit()
@@ -0,0 +1,145 @@
+"""Index of a directory of pattern files.
+
+Usage: python life_index.py build [directory]
+       python life_index.py query [directory] [--kind KIND] [--period N]
+                                  [--min-population N] [--max-population N]
+                                  [--rule RULE]
+"""
+import argparse
+import json
+import os
+
+from life import Life, canonical, pattern_files
+
+INDEX_FILE = '.index.json'
+INDEX_VERSION = 1
+MAX_GENERATIONS = 1000
+
+
+def describe(filename, max_generations=MAX_GENERATIONS):
+    """Return a dictionary with the properties of a pattern file.
+
+    The kind of pattern is 'still life', 'oscillator' or 'spaceship' when
+    it repeats from its first generation, 'stabilizes' when it repeats
+    only after some generations, and 'unknown' when it does not repeat
+    within max_generations.
+    """
+    life = Life()
+    life.load(filename)
+    minx, miny, maxx, maxy = life.bounding_box()
+    entry = {
+        'population': len(life.alive),
+        'bounding_box': [minx, miny, maxx, maxy],
+        'rule': life.rules_str(),
+        'hash': canonical(life.living_cells()),
+        'stabilization': None,
+        'period': None,
+        'displacement': None,
+        'kind': 'unknown',
+    }
+    result = life.period(max_generations)
+    if result is not None:
+        start, period, dx, dy = result
+        entry['stabilization'] = start
+        entry['period'] = period
+        entry['displacement'] = [dx, dy]
+        if start > 0:
+            entry['kind'] = 'stabilizes'
+        elif dx or dy:
+            entry['kind'] = 'spaceship'
+        elif period == 1:
+            entry['kind'] = 'still life'
+        else:
+            entry['kind'] = 'oscillator'
+    return entry
+
+
+def _read_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_FILE), 'rt') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {'version': INDEX_VERSION, 'patterns': {}, 'skipped': {}}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'patterns': {}, 'skipped': {}}
+    return index
+
+
+def load_index(directory):
+    """Load the index of a directory, or return an empty index."""
+    return _read_index(directory)['patterns']
+
+
+def build_index(directory, max_generations=MAX_GENERATIONS):
+    """Scan a directory of patterns and write its index.
+
+    Entries of files that did not change since the last build are reused.
+    Files that are not in a known pattern format are skipped, and are also
+    remembered so that they are not parsed again. Returns the dictionary of
+    entries, keyed by filename.
+    """
+    old_index = _read_index(directory)
+    index = {}
+    skipped = {}
+    for filename in pattern_files(directory):
+        path = os.path.join(directory, filename)
+        stat = os.stat(path)
+        if old_index['skipped'].get(filename) == [stat.st_mtime,
+                                                  stat.st_size]:
+            skipped[filename] = [stat.st_mtime, stat.st_size]
+            continue
+        entry = old_index['patterns'].get(filename)
+        if entry is None or entry['mtime'] != stat.st_mtime or \
+                entry['size'] != stat.st_size or \
+                entry['max_generations'] < max_generations:
+            try:
+                entry = describe(path, max_generations)
+            except (OSError, RuntimeError, ValueError):
+                skipped[filename] = [stat.st_mtime, stat.st_size]
+                continue
+            entry.update(mtime=stat.st_mtime, size=stat.st_size,
+                         max_generations=max_generations)
+        index[filename] = entry
+    with open(os.path.join(directory, INDEX_FILE), 'wt') as f:
+        json.dump({'version': INDEX_VERSION, 'patterns': index,
+                   'skipped': skipped}, f, separators=(',', ':'))
+    return index
+
+
+def query(index, kind=None, period=None, min_population=None,
+          max_population=None, rule=None):
+    """Return the sorted names of the indexed patterns that match."""
+    return sorted(
+        filename for filename, entry in index.items()
+        if (kind is None or entry['kind'] == kind)
+        and (period is None or entry['period'] == period)
+        and (min_population is None or entry['population'] >= min_population)
+        and (max_population is None or entry['population'] <= max_population)
+        and (rule is None or entry['rule'] == rule))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=['build', 'query'])
+    parser.add_argument('directory', nargs='?', default='patterns')
+    parser.add_argument('--max-generations', type=int,
+                        default=MAX_GENERATIONS)
+    parser.add_argument('--kind')
+    parser.add_argument('--period', type=int)
+    parser.add_argument('--min-population', type=int)
+    parser.add_argument('--max-population', type=int)
+    parser.add_argument('--rule')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build_index(args.directory, args.max_generations)
+        print(f'Indexed {len(index)} patterns')
+    else:
+        index = load_index(args.directory)
+        for filename in query(index, args.kind, args.period,
+                              args.min_population, args.max_population,
+                              args.rule):
+            entry = index[filename]
+            print(f'{filename:24s} {entry["kind"]:10s} '
+                  f'period={entry["period"]} '
+                  f'population={entry["population"]}')
@@ -0,0 +1,131 @@
+"""Game of Life on a dense grid stored in a memory-mapped file.
+
+The grid is bounded, cells outside of it are always dead, and it can be
+larger than the available memory. Cells are stored as bits, and the file
+holds two copies of the grid, the current generation and the next one.
+Each generation is calculated in bands of rows, with only three bands in
+memory at a time, so the file is read and written sequentially once.
+"""
+import os
+
+import numpy as np
+
+HEADER_SIZE = 64
+BAND_HEIGHT = 256
+
+
+class MemmapLife:
+    """Game of Life simulation on a memory-mapped dense grid.
+
+    A new file is created when the path does not exist, otherwise the grid
+    and the generation stored in the file are used and the width and height
+    arguments are ignored.
+    """
+
+    def __init__(self, path, width=None, height=None, survival=[2, 3],
+                 birth=[3], band_height=BAND_HEIGHT):
+        self.survival = survival
+        self.birth = birth
+        self.band_height = band_height
+        if os.path.exists(path):
+            self._header = np.memmap(path, dtype=np.uint64, mode='r+',
+                                     shape=(3,))
+            width, height = int(self._header[0]), int(self._header[1])
+        else:
+            if width is None or height is None:
+                raise ValueError('The size of a new grid is required')
+            self._header = np.memmap(path, dtype=np.uint64, mode='w+',
+                                     shape=(HEADER_SIZE // 8,))
+            self._header[:3] = (width, height, 0)
+        self.width = width
+        self.height = height
+        self._grids = np.memmap(path, dtype=np.uint8, mode='r+',
+                                offset=HEADER_SIZE,
+                                shape=(2, height, (width + 7) // 8))
+
+    @property
+    def generation(self):
+        """The number of generations that have been run."""
+        return int(self._header[2])
+
+    def _grid(self):
+        """Return the grid of the current generation."""
+        return self._grids[self.generation % 2]
+
+    def rules_str(self):
+        """Return the rules of the game as a printable string."""
+        survival_rule = "".join([str(n) for n in self.survival])
+        birth_rule = "".join([str(n) for n in self.birth])
+        return f'{survival_rule}/{birth_rule}'
+
+    def has(self, x, y):
+        """Check if a cell is alive."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return bool(self._grid()[y, x // 8] & (0x80 >> (x % 8)))
+
+    def toggle(self, x, y):
+        """Toggle a cell in the grid."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f'Cell ({x}, {y}) is outside the grid')
+        self._grid()[y, x // 8] ^= 0x80 >> (x % 8)
+
+    def add_cells(self, cells):
+        """Make many cells alive at once, ignoring those outside the grid."""
+        cells = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+        xs, ys = cells[:, 0], cells[:, 1]
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & \
+            (ys < self.height)
+        xs, ys = xs[inside], ys[inside]
+        np.bitwise_or.at(self._grid(), (ys, xs // 8),
+                         (0x80 >> (xs % 8)).astype(np.uint8))
+
+    def _bands(self, grid):
+        """Iterate over the bands of a grid, unpacked to one byte per cell."""
+        for top in range(0, self.height, self.band_height):
+            yield top, np.unpackbits(grid[top:top + self.band_height],
+                                     axis=1, count=self.width)
+
+    def living_cells(self):
+        """Iterate over the living cells."""
+        for top, band in self._bands(self._grid()):
+            ys, xs = np.nonzero(band)
+            yield from zip(xs.tolist(), (ys + top).tolist())
+
+    def population(self):
+        """Return the number of living cells."""
+        return sum(int(np.count_nonzero(band))
+                   for top, band in self._bands(self._grid()))
+
+    def advance(self):
+        """Advance the simulation by one time unit."""
+        rules = np.zeros(18, dtype=np.uint8)
+        rules[[n for n in self.birth if n <= 8]] = 1
+        rules[[9 + n for n in self.survival if n <= 8]] = 1
+        current = self._grids[self.generation % 2]
+        following = self._grids[(self.generation + 1) % 2]
+
+        empty_row = np.zeros((1, self.width), dtype=np.uint8)
+        above = empty_row
+        bands = self._bands(current)
+        top, band = next(bands)
+        while band is not None:
+            top_next, band_next = next(bands, (None, None))
+            below = empty_row if band_next is None else band_next[:1]
+            # the band with a row of context above and below, and a column
+            # of dead cells on each side
+            window = np.pad(np.concatenate((above, band, below)),
+                            ((0, 0), (1, 1)))
+            rows = band.shape[0]
+            neighbors = np.zeros((rows, self.width), dtype=np.uint8)
+            for i in range(3):
+                for j in range(3):
+                    if i != 1 or j != 1:
+                        neighbors += window[i:i + rows, j:j + self.width]
+            following[top:top + rows] = np.packbits(
+                rules[band * 9 + neighbors], axis=1)
+            above = band[-1:]
+            top, band = top_next, band_next
+        following.flush()
+        self._header[2] += 1
+        self._header.flush()
@@ -0,0 +1,191 @@
+"""Game of Life on a sparse grid of cells packed into single integers.
+
+Each living cell is stored in one flat set as the integer (y << 32) + x, so
+checking a cell takes a single hash lookup and no tuples are allocated. The
+neighbors of a cell are found by adding constant offsets to its key. The
+coordinates must fit in signed 32-bit integers, but the grid is otherwise
+unbounded, like the grid of the Life class.
+"""
+import collections
+
+from life import Life, _PhaseTimer, _ProbeCounter
+
+_SIGN = 1 << 31
+_MASK = (1 << 32) - 1
+
+# offsets that map the key of a cell to the keys of its eight neighbors
+_NEIGHBORS = tuple((j << 32) + i for j in range(-1, 2) for i in range(-1, 2)
+                   if i != 0 or j != 0)
+
+
+def pack(x, y):
+    """Return the key of a cell."""
+    return (y << 32) + x
+
+
+def unpack(key):
+    """Return the (x, y) cell of a key."""
+    x = ((key + _SIGN) & _MASK) - _SIGN
+    return x, (key - x) >> 32
+
+
+class PackedCellList:
+    """Maintain a list of (x, y) cells stored as packed integer keys."""
+
+    def __init__(self, keys=None):
+        self.keys = set() if keys is None else keys
+        # cached result of as_array(), discarded when the list is modified
+        self._array = None
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Return a new list with the cells of an iterable of (x, y) cells."""
+        return cls({(y << 32) + x for x, y in cells})
+
+    def has(self, x, y):
+        """Check if a cell exists in this list."""
+        return (y << 32) + x in self.keys
+
+    def set(self, x, y, value=None):
+        """Add, remove or toggle a cell in this list."""
+        key = (y << 32) + x
+        self._array = None
+        if value is None:
+            value = key not in self.keys
+        if value:
+            self.keys.add(key)
+        else:
+            self.keys.discard(key)
+
+    def add_rows(self, rows):
+        """Add many cells at once.
+
+        The rows argument maps y coordinates to iterables with the x
+        coordinates of the cells to add in each row.
+        """
+        self._array = None
+        for y, xs in rows.items():
+            row = y << 32
+            self.keys.update(row + x for x in xs)
+
+    def __iter__(self):
+        """Iterator over the cells in this list."""
+        return map(unpack, self.keys)
+
+    def __contains__(self, cell):
+        """Check if a (x, y) cell exists in this list."""
+        return self.has(*cell)
+
+    def as_array(self):
+        """Return the cells as a read-only buffer of 32-bit integers.
+
+        See CellList.as_array() for the details. The keys are unpacked with
+        NumPy, without creating a tuple for each cell.
+        """
+        if self._array is None:
+            import numpy as np
+
+            keys = np.fromiter(self.keys, np.int64, len(self.keys))
+            cells = np.empty((len(keys), 2), np.int32)
+            cells[:, 0] = ((keys + _SIGN) & _MASK) - _SIGN
+            cells[:, 1] = (keys - cells[:, 0]) >> 32
+            cells.flags.writeable = False
+            self._array = memoryview(cells)
+        return self._array
+
+    def query(self, x0, y0, x1, y1):
+        """Return a new list with the cells inside a rectangle.
+
+        See CellList.query() for the details.
+        """
+        keys = self.keys
+        if (x1 - x0) * (y1 - y0) < len(keys):
+            result = {key for key in ((y << 32) + x for y in range(y0, y1)
+                                      for x in range(x0, x1))
+                      if key in keys}
+        else:
+            result = {(y << 32) + x for x, y in self
+                      if x0 <= x < x1 and y0 <= y < y1}
+        return PackedCellList(result)
+
+    def copy(self):
+        """Return a copy of this list."""
+        return PackedCellList(set(self.keys))
+
+    def __len__(self):
+        """Return the number of cells in this list."""
+        return len(self.keys)
+
+    def __eq__(self, other):
+        """Check if two lists contain the same cells."""
+        if not isinstance(other, PackedCellList):
+            return NotImplemented
+        return self.keys == other.keys
+
+    def union(self, other):
+        """Return a new list with the cells that are in either list."""
+        return PackedCellList(self.keys | other.keys)
+
+    def intersection(self, other):
+        """Return a new list with the cells that are in both lists."""
+        return PackedCellList(self.keys & other.keys)
+
+    def difference(self, other):
+        """Return a new list with the cells that are not in the other list."""
+        return PackedCellList(self.keys - other.keys)
+
+    def symmetric_difference(self, other):
+        """Return a new list with the cells that are in only one list."""
+        return PackedCellList(self.keys ^ other.keys)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+    def translate(self, dx, dy):
+        """Return a new list with all the cells shifted by (dx, dy)."""
+        offset = (dy << 32) + dx
+        return PackedCellList({key + offset for key in self.keys})
+
+
+class PackedLife(Life):
+    """Game of Life simulation on a grid of packed integer keys.
+
+    The neighbors of all the living cells are counted in a single pass,
+    instead of checking the eight neighbors of every candidate cell.
+    """
+
+    PHASES = ('neighbors', 'rules')
+
+    def __init__(self, survival=[2, 3], birth=[3]):
+        super().__init__(survival, birth)
+        self.alive = PackedCellList()
+
+    def _next_generation(self, stats=None):
+        """Calculate the cells that are alive in the next generation.
+
+        See Life._next_generation() for the statistics.
+        """
+        timer = _PhaseTimer(stats)
+        keys = self.alive.keys
+        counts = collections.Counter(key + offset for key in keys
+                                     for offset in _NEIGHBORS)
+        timer.lap('neighbors')
+
+        if stats is not None:
+            keys = _ProbeCounter(keys)
+        survival = set(self.survival)
+        birth = set(self.birth)
+        new_keys = {key for key, count in counts.items()
+                    if count in (survival if key in keys else birth)}
+        examined = len(counts)
+        if 0 in survival:
+            # isolated cells have no neighbors and were not counted
+            new_keys.update(key for key in keys if key not in counts)
+            examined += len(keys)
+        timer.lap('rules')
+        if stats is not None:
+            stats['cells_examined'] += examined
+            stats['has_probes'] += keys.probes
+        return PackedCellList(new_keys)
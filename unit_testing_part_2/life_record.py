@@ -0,0 +1,143 @@
+"""Record a simulation to a sequence of PNG images without a display.
+
+Usage: python life_record.py pattern-file output-dir [--generations N]
+                             [--size WIDTHxHEIGHT] [--scale S]
+                             [--every N] [--workers W]
+
+Frames are drawn with NumPy, with the same colors and grid as life_gui,
+and the view is centered on the pattern like when life_gui starts. The
+simulation runs as fast as it can in this process, while the frames are
+rendered and compressed by a pool of worker processes.
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from life_packed import PackedLife
+
+# the colors of the grid, which life_gui imports from here
+BACKGROUND_COLOR = (255, 255, 255)
+GRID_COLOR = (0, 0, 0)
+CELL_COLOR = (80, 80, 192)
+
+
+def render(cells, width, height, scale):
+    """Render cells as an RGB image array with shape (height, width, 3).
+
+    The cells are an (N, 2) array of coordinates relative to the top-left
+    cell of the image. Each cell is a square of scale pixels with a grid
+    line along its top and left sides, like in life_gui.
+    """
+    columns = -(-width // scale)
+    rows = -(-height // scale)
+    cells = np.asarray(cells).reshape(-1, 2)
+    inside = (cells[:, 0] >= 0) & (cells[:, 0] < columns) & \
+        (cells[:, 1] >= 0) & (cells[:, 1] < rows)
+    grid = np.zeros((rows, columns), dtype=bool)
+    grid[cells[inside, 1], cells[inside, 0]] = True
+
+    # position of each pixel inside its cell
+    xs = np.arange(width) % scale
+    ys = np.arange(height) % scale
+    interior_x = (xs >= 2) & (xs <= scale - 2)
+    interior_y = (ys >= 2) & (ys <= scale - 2)
+    alive = grid[np.arange(height) // scale][:, np.arange(width) // scale]
+    alive &= interior_y[:, np.newaxis] & interior_x[np.newaxis, :]
+    image = np.where(alive[:, :, np.newaxis], np.uint8(CELL_COLOR),
+                     np.uint8(BACKGROUND_COLOR))
+    image[ys == 0, :] = GRID_COLOR
+    image[:, xs == 0] = GRID_COLOR
+    return image
+
+
+def _chunk(chunk_type, data):
+    return (struct.pack('>I', len(data)) + chunk_type + data +
+            struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+
+def encode_png(image, level=6):
+    """Encode an RGB image array as a PNG file."""
+    height, width, _ = image.shape
+    # each row starts with a filter type byte, 0 for no filter
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 3)
+    return (b'\x89PNG\r\n\x1a\n' +
+            _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0,
+                                        0, 0)) +
+            _chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) +
+            _chunk(b'IEND', b''))
+
+
+def _write_frame(args):
+    path, cells, width, height, scale = args
+    with open(path, 'wb') as f:
+        f.write(encode_png(render(cells, width, height, scale)))
+
+
+def record(life, generations, directory, width=500, height=500, scale=10,
+           basex=None, basey=None, every=1, workers=None):
+    """Advance a game and save a frame every given number of generations.
+
+    The first frame is the current generation. Frames are saved as
+    frame_000000.png, frame_000001.png and so on. The view is centered on
+    the living cells when basex and basey are not given. Returns the number
+    of frames that were saved.
+    """
+    if basex is None or basey is None:
+        minx, miny, maxx, maxy = life.bounding_box()
+        basex = minx - (width // scale - (maxx - minx + 1)) // 2
+        basey = miny - (height // scale - (maxy - miny + 1)) // 2
+    columns = -(-width // scale)
+    rows = -(-height // scale)
+    os.makedirs(directory, exist_ok=True)
+
+    frames = 0
+    pending = collections.deque()
+    with multiprocessing.Pool(workers) as pool:
+        # the number of frames waiting for a worker is limited, so that the
+        # simulation does not run too far ahead of the encoding
+        max_pending = 4 * (workers or os.cpu_count() or 1)
+        for generation in range(generations + 1):
+            if generation % every == 0:
+                visible = life.alive.query(basex, basey, basex + columns,
+                                           basey + rows)
+                cells = np.asarray(visible.as_array()).reshape(-1, 2) - \
+                    (basex, basey)
+                path = os.path.join(directory, f'frame_{frames:06d}.png')
+                pending.append(pool.apply_async(
+                    _write_frame, ((path, cells, width, height, scale),)))
+                frames += 1
+                while len(pending) > max_pending:
+                    pending.popleft().get()
+            if generation < generations:
+                life.advance()
+        while pending:
+            pending.popleft().get()
+    return frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pattern_file')
+    parser.add_argument('output_dir')
+    parser.add_argument('--generations', type=int, default=100)
+    parser.add_argument('--size', default='500x500')
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--every', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if args.scale < 4:
+        # smaller cells have no pixels left inside their grid lines
+        parser.error('--scale must be at least 4')
+
+    width, height = [int(i) for i in args.size.split('x', 1)]
+    life = PackedLife()
+    life.load(args.pattern_file)
+    frames = record(life, args.generations, args.output_dir, width, height,
+                    args.scale, every=args.every, workers=args.workers)
+    print(f'{frames} frames saved to {args.output_dir}')
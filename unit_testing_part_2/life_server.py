@@ -0,0 +1,191 @@
+"""Stream a running Life simulation to many clients over TCP.
+
+Usage: python life_server.py [pattern-file] [--host HOST] [--port PORT]
+                             [--tick SECONDS]
+
+All messages start with a header with the message type, the generation
+and two cell counts, followed by the cells as pairs of 32-bit integers.
+A KEYFRAME message has all the living cells in the viewport of the
+client, and a DELTA message has the cells that were born followed by the
+cells that died in a generation. Clients can send a VIEWPORT message at
+any time to receive only the cells inside a rectangle; they receive a new
+keyframe in response.
+
+Each client has a bounded queue of outgoing messages. When a client is too
+slow to keep up and its queue fills, its pending deltas are dropped and it
+receives a keyframe instead, so a slow client never delays the simulation.
+"""
+from array import array
+import argparse
+import asyncio
+import struct
+import sys
+
+from life import Life, _pack
+
+KEYFRAME = 1
+DELTA = 2
+VIEWPORT = 3
+
+HEADER = struct.Struct('<BQII')
+VIEWPORT_MESSAGE = struct.Struct('<Biiii')
+
+# queued for a client in place of a delta when it needs a new keyframe
+_SEND_KEYFRAME = object()
+
+
+def _visible(cells, viewport):
+    """Return the cells that are inside a viewport."""
+    if viewport is None:
+        return cells
+    left, top, width, height = viewport
+    return cells.query(left, top, left + width, top + height)
+
+
+def encode(message_type, generation, cells, other_cells=()):
+    """Encode a message with one or two groups of cells."""
+    cells = _pack(cells)
+    other_cells = _pack(other_cells)
+    if sys.byteorder != 'little':
+        cells.byteswap()
+        other_cells.byteswap()
+    return (HEADER.pack(message_type, generation, len(cells) // 2,
+                        len(other_cells) // 2) +
+            cells.tobytes() + other_cells.tobytes())
+
+
+async def read_message(reader):
+    """Read a message from a stream.
+
+    Returns a (message_type, generation, cells, other_cells) tuple, where
+    each group of cells is a list of (x, y) tuples.
+    """
+    message_type, generation, count, other_count = HEADER.unpack(
+        await reader.readexactly(HEADER.size))
+    packed = array('i')
+    packed.frombytes(await reader.readexactly(
+        (count + other_count) * 2 * packed.itemsize))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    cells = list(zip(packed[0:2 * count:2], packed[1:2 * count:2]))
+    other_cells = list(zip(packed[2 * count::2], packed[2 * count + 1::2]))
+    return message_type, generation, cells, other_cells
+
+
+class _Client:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.viewport = None
+        self.generation = -1
+        self.queue = asyncio.Queue(queue_size)
+
+    def request_keyframe(self):
+        """Drop the pending messages and send a keyframe next."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_SEND_KEYFRAME)
+
+
+class LifeServer:
+    """Advance a game on a fixed tick and stream it to clients."""
+
+    def __init__(self, life, tick=0.2, queue_size=16):
+        self.life = life
+        self.tick = tick
+        self.queue_size = queue_size
+        self.clients = set()
+        self.snapshot = (life.generation, life.alive)
+
+    async def start(self, host='localhost', port=8765):
+        """Start accepting clients and return the asyncio server."""
+        return await asyncio.start_server(self._handle_client, host, port)
+
+    async def run(self, generations=None):
+        """Advance the game on every tick and broadcast the changes."""
+        loop = asyncio.get_running_loop()
+        done = 0
+        while generations is None or done < generations:
+            start = loop.time()
+            births, deaths = await loop.run_in_executor(None, self._step)
+            self.snapshot = (self.life.generation, self.life.alive)
+            self.broadcast(self.life.generation, births, deaths)
+            done += 1
+            await asyncio.sleep(max(0, self.tick - (loop.time() - start)))
+
+    def _step(self):
+        """Advance the game and return the cells that were born and died."""
+        old_alive = self.life.alive
+        self.life.advance()
+        return self.life.alive - old_alive, old_alive - self.life.alive
+
+    def broadcast(self, generation, births, deaths):
+        """Queue a delta for every client."""
+        messages = {}
+        for client in self.clients:
+            viewport = client.viewport
+            if viewport not in messages:
+                messages[viewport] = encode(DELTA, generation,
+                                            _visible(births, viewport),
+                                            _visible(deaths, viewport))
+            try:
+                client.queue.put_nowait((generation, messages[viewport]))
+            except asyncio.QueueFull:
+                client.request_keyframe()
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer, self.queue_size)
+        client.request_keyframe()
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send_messages(client))
+        try:
+            while True:
+                message = await reader.readexactly(VIEWPORT_MESSAGE.size)
+                message_type, *viewport = VIEWPORT_MESSAGE.unpack(message)
+                if message_type == VIEWPORT:
+                    client.viewport = tuple(viewport)
+                    client.request_keyframe()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_messages(self, client):
+        try:
+            while True:
+                item = await client.queue.get()
+                if item is _SEND_KEYFRAME:
+                    generation, alive = self.snapshot
+                    data = encode(KEYFRAME, generation,
+                                  _visible(alive, client.viewport))
+                else:
+                    generation, data = item
+                    if generation <= client.generation:
+                        # already included in a keyframe
+                        continue
+                client.writer.write(data)
+                client.generation = generation
+                await client.writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def main(pattern_file, host, port, tick):
+    life = Life()
+    if pattern_file:
+        life.load(pattern_file)
+    server = LifeServer(life, tick)
+    async with await server.start(host, port):
+        print(f'Serving {pattern_file or "an empty grid"} on {host}:{port}')
+        await server.run()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pattern_file', nargs='?')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tick', type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.pattern_file, args.host, args.port, args.tick))
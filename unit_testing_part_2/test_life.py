@@ -1,12 +1,17 @@
 import itertools
+import json
+import os
 import random
+import shutil
+import tempfile
+import tracemalloc
 import unittest
 from unittest import mock
 
 import pytest
 from parameterized import parameterized
 
-from life import CellList, Life
+from life import CellList, Life, canonical, load_patterns, pattern_files
 
 # pytest --cov=life --cov-report=term-missing --cov-branch
 
@@ -70,6 +75,108 @@ class TestCellList(unittest.TestCase):
         c.set(1, 2)
         assert not c.has(1, 2)
         assert list(c) == []
+
+    def _cell_list(self, cells):
+        c = CellList()
+        for cell in cells:
+            c.set(*cell, True)
+        return c
+
+    def test_set_algebra(self):
+        """
+        Union, intersection, difference and symmetric difference work row by row and must
+        give the same results as the equivalent operations on Python sets.
+        :return:
+        """
+        a_cells = {(1, 2), (3, 2), (5, 7), (-4, 0)}
+        b_cells = {(3, 2), (6, 2), (-4, 0), (9, 9)}
+        a = self._cell_list(a_cells)
+        b = self._cell_list(b_cells)
+        assert set(a | b) == a_cells | b_cells
+        assert set(a & b) == a_cells & b_cells
+        assert set(a - b) == a_cells - b_cells
+        assert set(b - a) == b_cells - a_cells
+        assert set(a ^ b) == a_cells ^ b_cells
+        # the operands are never modified
+        assert set(a) == a_cells and set(b) == b_cells
+        # empty rows are not left behind
+        assert (a - a).cells == {}
+        assert len(a | b) == len(a_cells | b_cells)
+
+    def test_equality(self):
+        """
+        Two cell lists are equal when they contain the same cells, regardless of insertion order.
+        :return:
+        """
+        a = self._cell_list([(1, 2), (3, 4)])
+        b = self._cell_list([(3, 4), (1, 2)])
+        assert a == b
+        b.set(1, 2, False)
+        assert a != b
+        b.set(1, 2, True)
+        assert a == b
+        assert a != [(1, 2), (3, 4)]
+
+    def test_translate(self):
+        """
+        translate() returns a shifted copy of the list.
+        :return:
+        """
+        a = self._cell_list([(1, 2), (3, 2), (0, -1)])
+        assert set(a.translate(2, -3)) == {(3, -1), (5, -1), (2, -4)}
+        assert set(a.translate(0, 1)) == {(1, 3), (3, 3), (0, 0)}
+        assert a.translate(0, 0) == a
+        assert set(a) == {(1, 2), (3, 2), (0, -1)}
+
+    def test_add_rows(self):
+        """
+        add_rows() inserts whole rows of cells at once, without modifying copies of the list.
+        :return:
+        """
+        a = self._cell_list([(1, 2)])
+        b = a.copy()
+        a.add_rows({2: [5, 6], 3: range(3), 4: []})
+        assert set(a) == {(1, 2), (5, 2), (6, 2), (0, 3), (1, 3), (2, 3)}
+        assert 4 not in a.cells
+        assert set(b) == {(1, 2)}
+
+    def test_as_array(self):
+        """
+        as_array() returns an (N, 2) view of the cells that is cached until the list is modified.
+        :return:
+        """
+        a = CellList()
+        assert a.as_array().tolist() == []
+        a = self._cell_list([(1, 2), (-3, 2), (0, -1)])
+        view = a.as_array()
+        assert view.shape == (3, 2)
+        assert view.format == 'i'
+        assert view.readonly
+        assert sorted(map(tuple, view.tolist())) == sorted(a)
+        assert a.as_array() is view
+        a.set(5, 5, True)
+        assert a.as_array() is not view
+        assert a.as_array().shape == (4, 2)
+        view = a.as_array()
+        a.add_rows({7: [1]})
+        assert a.as_array().shape == (5, 2)
+        assert view.shape == (4, 2)
+
+    @parameterized.expand([(-2, -2, 3, 4), (0, 1, 1, 2), (-100, -100, 100, 100),
+                           (5, 5, 5, 9), (3, -50, 4, 50)])
+    def test_query(self, x0, y0, x1, y1):
+        """
+        query() returns the cells inside a rectangle, whether the rectangle is smaller or larger than the list.
+        :return:
+        """
+        cells = [(x, y) for x in range(-5, 6) for y in range(-5, 6)
+                 if (x * y) % 3 == 0]
+        a = self._cell_list(cells)
+        expected = {(x, y) for x, y in cells if x0 <= x < x1 and y0 <= y < y1}
+        result = a.query(x0, y0, x1, y1)
+        assert set(result) == expected
+        assert isinstance(result, CellList)
+        assert all(result.cells.values())
 class TestLife(unittest.TestCase):
         def test_new(self):
             """
@@ -273,3 +380,315 @@ class TestLife(unittest.TestCase):
                 (19, 20), (20, 20), (21, 20),
                 (19, 21), (20, 21), (21, 21),
             }
+
+        """
+        find() correlates the grid with every orientation of a pattern.
+        The grid below has an upright glider at (10, 10), a glider rotated
+        by 90 degrees at (30, 5), an isolated block at (0, 0) and a block at
+        (20, 20) that touches another cell, so it is not a match.
+        """
+        def _find_grid(self):
+            life = Life()
+            for x, y in [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]:
+                life.toggle(x + 10, y + 10)
+            for x, y in [(0, 0), (0, 1), (0, 2), (1, 2), (2, 1)]:
+                life.toggle(x + 30, y + 5)
+            for x, y in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+                life.toggle(x, y)
+                life.toggle(x + 20, y + 20)
+            life.toggle(22, 22)
+            return life
+
+        def test_find(self):
+            life = self._find_grid()
+            glider = Life()
+            glider.load('patterns/glider.txt')
+            assert life.find(glider) == [(10, 10), (30, 5)]
+            assert life.find(glider, orientations='none') == [(10, 10)]
+            assert life.find(glider.alive, orientations='rotations') == \
+                [(10, 10), (30, 5)]
+            assert life.find([(0, 0), (1, 0), (0, 1), (1, 1)]) == [(0, 0)]
+
+        def test_find_far_apart(self):
+            """
+            Groups of cells far apart are searched without a grid that covers
+            the space between them, including matches across tile edges.
+            :return:
+            """
+            life = Life()
+            glider = [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]
+            corners = [(20000, 20000), (-7, -5), (254, 255), (-2, 510)]
+            for x0, y0 in corners:
+                for x, y in glider:
+                    life.toggle(x + x0, y + y0)
+            # a glider that touches another cell is not a match
+            life.toggle(-3, 510)
+            assert life.find(glider, orientations='none') == \
+                sorted(corners[:3])
+
+        def test_find_no_match(self):
+            life = self._find_grid()
+            assert life.find([(0, 0), (1, 0), (2, 0)]) == []
+            assert life.find([]) == []
+            assert Life().find([(0, 0)]) == []
+            with pytest.raises(ValueError):
+                life.find([(0, 0)], orientations='sideways')
+
+        def test_objects(self):
+            life = Life()
+            for x, y in [(0, 0), (1, 1), (5, 5), (5, 6), (9, 0)]:
+                life.toggle(x, y)
+            objects = sorted(sorted(obj) for obj in life.objects())
+            assert objects == [[(0, 0), (1, 1)], [(5, 5), (5, 6)], [(9, 0)]]
+            assert Life().objects() == []
+
+        @parameterized.expand([
+            ('patterns/block.txt', (0, 1, 0, 0)),
+            ('patterns/blinker.txt', (0, 2, 0, 0)),
+            ('patterns/pulsar.txt', (0, 3, 0, 0)),
+            ('patterns/glider.txt', (0, 4, 1, 1)),
+        ])
+        def test_period(self, pattern, expected):
+            life = Life()
+            life.load(pattern)
+            cells = set(life.living_cells())
+            assert life.period(10) == expected
+            # the game itself is not advanced
+            assert set(life.living_cells()) == cells
+
+        def test_period_not_found(self):
+            life = Life()
+            life.load('patterns/r-pentomino.txt')
+            assert life.period(10) is None
+
+        def test_canonical(self):
+            glider = [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]
+            rotated = [(-y, x) for x, y in glider]
+            reflected = [(x + 100, -y) for x, y in glider]
+            assert canonical(glider) == canonical(rotated)
+            assert canonical(glider) == canonical(reflected)
+            assert canonical(glider) != canonical(glider[1:])
+
+        def test_history(self):
+            life = Life()
+            life.load('patterns/r-pentomino.txt')
+            life.keep_history(checkpoint_interval=8)
+            states = [life.alive.copy()]
+            for i in range(50):
+                life.advance()
+                states.append(life.alive.copy())
+            assert life.generation == 50
+            for generation, state in enumerate(states):
+                assert life.at(generation) == state
+            life.rewind(10)
+            assert life.generation == 40
+            assert life.alive == states[40]
+            with pytest.raises(ValueError):
+                life.at(41)
+            life.advance()
+            assert life.alive == states[41]
+            assert life.at(3) == states[3]
+
+        def test_history_memory_limit(self):
+            life = Life()
+            life.load('patterns/r-pentomino.txt')
+            life.keep_history(checkpoint_interval=4, max_memory=10000)
+            states = [life.alive.copy()]
+            for i in range(100):
+                life.advance()
+                states.append(life.alive.copy())
+            assert life.history.memory <= 10000
+            assert 0 < life.history.oldest < 100
+            assert life.history.oldest % 4 == 0
+            with pytest.raises(ValueError):
+                life.at(0)
+            assert life.at(life.history.oldest) == states[life.history.oldest]
+            assert life.at(99) == states[99]
+
+        def test_history_edit(self):
+            life = Life()
+            with pytest.raises(ValueError):
+                life.rewind()
+            life.load('patterns/blinker.txt')
+            life.keep_history()
+            life.advance()
+            life.toggle(10, 10)
+            assert life.history.oldest == 1
+            with pytest.raises(ValueError):
+                life.at(0)
+            life.advance()
+            life.rewind()
+            assert life.generation == 1
+            assert life.alive.has(10, 10)
+
+        def test_place(self):
+            life = Life()
+            life.toggle(0, 0)
+            life.keep_history()
+            glider = Life()
+            glider.load('patterns/glider.txt')
+            life.place(glider, 10, -5)
+            life.place([(0, 0), (1, 0)], 0, 0)
+            assert set(life.living_cells()) == {
+                (0, 0), (1, 0), (10, -6), (9, -4), (10, -4), (11, -4),
+                (11, -5)}
+            assert life.history.oldest == life.generation
+
+        def test_fork(self):
+            life = Life()
+            life.load('patterns/glider.txt')
+            life.advance()
+            fork = life.fork()
+            assert fork.alive == life.alive
+            assert fork.generation == 1
+            assert fork.rules_str() == life.rules_str()
+            # rows are shared until one of the games modifies them
+            assert all(fork.alive.cells[y] is life.alive.cells[y]
+                       for y in life.alive.cells)
+            original = set(life.living_cells())
+            assert (0, 0) not in original
+            fork.toggle(0, 0)
+            fork.toggle(100, 100)
+            assert set(life.living_cells()) == original
+            assert set(fork.living_cells()) == original | {(0, 0), (100, 100)}
+            # only the modified rows were copied
+            assert fork.alive.cells[0] is not life.alive.cells[0]
+            assert fork.alive.cells[1] is life.alive.cells[1]
+            life.toggle(1, 1)
+            assert not life.alive.has(1, 1)
+            assert fork.alive.has(1, 1)
+            fork.advance()
+            life.advance()
+            assert fork.generation == life.generation == 2
+
+        def test_instrument(self):
+            expected = Life()
+            expected.load('patterns/r-pentomino.txt')
+            life = Life()
+            life.load('patterns/r-pentomino.txt')
+            records = []
+            stats = life.instrument(callback=records.append)
+            for i in range(10):
+                expected.advance()
+                life.advance()
+            assert life.alive == expected.alive
+            assert len(stats.generations) == 10
+            assert records == stats.generations
+            entry = stats.generations[-1]
+            assert entry['generation'] == 10
+            assert entry['population'] == len(life.alive)
+            # _advance_cell() probes each examined cell and its 8 neighbors
+            assert entry['has_probes'] == 9 * entry['cells_examined']
+            assert set(entry['time']) == set(Life.PHASES)
+            assert 'allocated_bytes' not in entry
+            data = json.loads(stats.to_json())
+            assert len(data['generations']) == 10
+            assert set(data['totals']) == set(Life.PHASES)
+            assert data['totals']['rules'] > 0
+
+        """
+        The statistics are collected on the real algorithm, so a mocked
+        _advance_cell() is still called and makes no probes on the grid.
+        """
+        @mock.patch.object(Life, '_advance_cell')
+        def test_instrument_mock(self, mock_advance_cell):
+            mock_advance_cell.return_value = False
+            life = Life()
+            life.toggle(10, 10)
+            life.toggle(12, 10)
+            stats = life.instrument()
+            life.advance()
+            assert mock_advance_cell.call_count == 15
+            assert stats.generations[0]['cells_examined'] == 15
+            assert stats.generations[0]['has_probes'] == 0
+            assert list(life.living_cells()) == []
+            # the grid is restored after the probes are counted
+            assert type(life.alive) is CellList
+
+        def test_instrument_memory(self):
+            life = Life()
+            life.load('patterns/glider.txt')
+            stats = life.instrument(trace_memory=True)
+            life.advance()
+            assert stats.generations[0]['allocated_bytes'] > 0
+            life.uninstrument()
+            assert not tracemalloc.is_tracing()
+            life.advance()
+            assert len(stats.generations) == 1
+
+        def test_instrument_memory_tracing(self):
+            """
+            Memory tracing that was already on is left on when the statistics stop.
+            :return:
+            """
+            tracemalloc.start()
+            self.addCleanup(tracemalloc.stop)
+            life = Life()
+            life.load('patterns/glider.txt')
+            life.instrument(trace_memory=True)
+            life.advance()
+            life.uninstrument()
+            assert tracemalloc.is_tracing()
+
+        def test_region(self):
+            life = Life()
+            life.load('patterns/gosper-glider-gun.txt')
+            region = life.set_region(-5, -5, 45, 25, log=True)
+            populations = []
+            for i in range(600):
+                life.advance()
+                populations.append(len(life.alive))
+            # the gliders are removed, so the population does not grow
+            assert max(populations[300:]) == max(populations[:300])
+            assert len(region.escaped) > 10
+            for entry in region.escaped:
+                assert (entry['dx'], entry['dy'], entry['period']) == \
+                    (1, 1, 4)
+                assert entry['generation'] % region.interval == 0
+                assert region.distance(entry['x'], entry['y'],
+                                       entry['x'] + 2, entry['y'] + 2) > 0
+
+        def test_region_approaching(self):
+            """
+            Spaceships outside of the region are kept while they move
+            towards it, and removed once they move away from it.
+            :return:
+            """
+            life = Life()
+            life.load('patterns/glider.txt')
+            region = life.set_region(10, 10, 20, 20, interval=4)
+            for i in range(16):
+                life.advance()
+            assert len(life.alive) == 5
+            life.set_region(-20, -20, -10, -10, interval=4)
+            life.advance()
+            assert len(life.alive) == 5
+            for i in range(3):
+                life.advance()
+            assert len(life.alive) == 0
+            assert region.escaped is None
+
+
+class TestLoadPatterns(unittest.TestCase):
+    def test_load_patterns(self):
+        """
+        Only the regular files that load as patterns are returned, in order of name.
+        Subdirectories, broken links, hidden files and other files are skipped.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            shutil.copy('patterns/glider.txt', directory)
+            shutil.copy('patterns/blinker.txt', directory)
+            os.mkdir(os.path.join(directory, 'more'))
+            os.symlink(os.path.join(directory, 'missing.txt'),
+                       os.path.join(directory, 'broken.txt'))
+            with open(os.path.join(directory, '.hidden'), 'wt') as f:
+                f.write('#Life 1.06\n0 0\n')
+            with open(os.path.join(directory, 'notes.txt'), 'wt') as f:
+                f.write('not a pattern\n')
+            assert pattern_files(directory) == ['blinker.txt', 'glider.txt',
+                                                'notes.txt']
+            patterns = load_patterns(directory)
+        assert [filename for filename, life in patterns] == \
+            ['blinker.txt', 'glider.txt']
+        assert len(patterns[1][1].alive) == 5
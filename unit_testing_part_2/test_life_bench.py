@@ -0,0 +1,39 @@
+import unittest
+
+import life_bench
+
+
+class TestBench(unittest.TestCase):
+    def test_cases(self):
+        cases = life_bench.cases('patterns', [3, 4])
+        assert 'pattern:glider.txt' in cases
+        assert cases[-2:] == ['soup:3', 'soup:4']
+
+    def test_run_case(self):
+        """
+        A case runs for the requested number of generations and reports its speed.
+        :return:
+        """
+        result = life_bench.run_case('celllist', 'pattern:glider.txt',
+                                     generations=5)
+        assert result['generations'] == 5
+        assert result['generations_per_second'] > 0
+        assert result['ns_per_cell'] > 0
+        result = life_bench.run_case('celllist', 'soup:3', generations=100,
+                                     max_time=0)
+        assert result['generations'] == 1
+
+    def test_compare(self):
+        """
+        Only cases that are slower than the baseline by more than the threshold are regressions.
+        :return:
+        """
+        baseline = {'a': {'generations_per_second': 100.0},
+                    'b': {'generations_per_second': 100.0}}
+        results = {'a': {'generations_per_second': 95.0},
+                   'b': {'generations_per_second': 80.0},
+                   'c': {'generations_per_second': 1.0}}
+        regressions = life_bench.compare(results, baseline, threshold=0.1)
+        assert len(regressions) == 1
+        assert regressions[0].startswith('b:')
+        assert life_bench.compare(results, baseline, threshold=0.25) == []
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from life import Life
+from life_cache import SimulationCache, cache_key
+from life_packed import PackedCellList, PackedLife
+
+
+class TestSimulationCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.dat')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _pattern(self, name):
+        life = Life()
+        life.load(os.path.join('patterns', name))
+        return life
+
+    def test_cache_key(self):
+        """
+        The key depends on the shape of the pattern, the rules and the number of generations, not on its position.
+        :return:
+        """
+        life = self._pattern('glider.txt')
+        key, minx, miny = cache_key(life, 10)
+        assert (minx, miny) == (-1, -1)
+        moved = Life()
+        moved.alive = life.alive.translate(50, -20)
+        assert cache_key(moved, 10) == (key, 49, -21)
+        assert cache_key(life, 11)[0] != key
+        life.survival = [2]
+        assert cache_key(life, 10)[0] != key
+
+    def test_advance(self):
+        """
+        Cached results are reused, also by a new cache object opened on the same file, and match a normal simulation.
+        :return:
+        """
+        expected = self._pattern('r-pentomino.txt')
+        for i in range(20):
+            expected.advance()
+
+        with SimulationCache(self.path) as cache:
+            life = self._pattern('r-pentomino.txt')
+            cache.advance(life, 20)
+            assert life.alive == expected.alive
+
+        with SimulationCache(self.path) as cache:
+            life = self._pattern('r-pentomino.txt')
+            life.alive = life.alive.translate(5, 5)
+            with mock.patch.object(Life, 'advance') as mock_advance:
+                cache.advance(life, 20)
+            assert mock_advance.call_count == 0
+            assert life.alive == expected.alive.translate(5, 5)
+            assert life.generation == 20
+
+    def test_advance_packed(self):
+        """
+        A cached result keeps the grid type of the game, so a PackedLife can be advanced after a cache hit.
+        :return:
+        """
+        expected = PackedLife()
+        expected.load('patterns/r-pentomino.txt')
+        for i in range(30):
+            expected.advance()
+
+        with SimulationCache(self.path) as cache:
+            for i in range(2):
+                life = PackedLife()
+                life.load('patterns/r-pentomino.txt')
+                cache.advance(life, 20)
+                assert isinstance(life.alive, PackedCellList)
+                for j in range(10):
+                    life.advance()
+                assert life.alive == expected.alive
+
+    def test_shared_file(self):
+        """
+        Records written by another cache object on the same file are found when they are not in the index yet.
+        :return:
+        """
+        reader = SimulationCache(self.path)
+        writer = SimulationCache(self.path)
+        key = cache_key(self._pattern('block.txt'), 1)[0]
+        assert reader.get(key) is None
+        writer.advance(self._pattern('block.txt'), 1)
+        packed = reader.get(key)
+        assert sorted(zip(packed[::2], packed[1::2])) == \
+            [(0, 0), (0, 1), (1, 0), (1, 1)]
+        reader.close()
+        writer.close()
+
+    def test_memory_limit(self):
+        """
+        The least recently used results are evicted from memory, but remain available on disk.
+        :return:
+        """
+        with SimulationCache(self.path, max_memory=200) as cache:
+            keys = []
+            for name in ['glider.txt', 'pulsar.txt', 'block.txt']:
+                life = self._pattern(name)
+                keys.append(cache_key(life, 4)[0])
+                cache.advance(life, 4)
+            assert cache.memory <= 200
+            assert keys[0] not in cache.recent
+            assert keys[2] in cache.recent
+            assert cache.get(keys[0]) is not None
+            assert keys[0] in cache.recent
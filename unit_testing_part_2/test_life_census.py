@@ -0,0 +1,73 @@
+import unittest
+
+from life import Life
+import life_census
+from life_packed import PackedCellList
+
+
+class TestCensus(unittest.TestCase):
+    def test_soup(self):
+        """
+        Soups generated from the same seed must be identical.
+        :return:
+        """
+        a = life_census.soup(42)
+        b = life_census.soup(42)
+        assert a.alive == b.alive
+        assert a.bounding_box()[2] < life_census.SOUP_SIZE
+        assert life_census.soup(43).alive != a.alive
+        assert isinstance(a.alive, PackedCellList)
+
+    def test_object_key(self):
+        """
+        The two phases of a blinker, and gliders in different phases and orientations, share a key.
+        :return:
+        """
+        life = Life()
+        life.load('patterns/blinker.txt')
+        vertical = life.alive.copy()
+        life.advance()
+        assert life_census.object_key(vertical) == \
+            life_census.object_key(life.alive)
+        life.load('patterns/glider.txt')
+        glider = life.alive.copy()
+        life.advance()
+        assert life_census.object_key(glider) == \
+            life_census.object_key(life.alive.translate(-3, 7))
+        assert life_census.object_key(glider) != \
+            life_census.object_key(vertical)
+
+    def test_census(self):
+        """
+        Two blocks and a blinker stabilize right away and are counted as two different objects.
+        :return:
+        """
+        life = Life()
+        for x, y in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            life.toggle(x, y)
+            life.toggle(x + 10, y - 7)
+        for y in range(3):
+            life.toggle(20, y)
+        assert life_census.stabilize(life, max_period=3) is not None
+        counts, samples = life_census.census(life)
+        assert sorted(counts.values()) == [1, 2]
+        block = [key for key, count in counts.items() if count == 2][0]
+        assert samples[block] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    def test_stabilize(self):
+        """
+        A grid that repeats itself is stable right away, while a glider never repeats
+        in place and is stable once its population has been constant for the window.
+        :return:
+        """
+        life = Life()
+        life.load('patterns/blinker.txt')
+        assert life_census.stabilize(life, max_period=4) == 2
+        life = Life()
+        life.load('patterns/glider.txt')
+        assert life_census.stabilize(life, max_period=4) == 12
+
+    def test_stabilize_limit(self):
+        life = Life()
+        life.load('patterns/r-pentomino.txt')
+        assert life_census.stabilize(life, max_generations=50) is None
@@ -0,0 +1,51 @@
+import unittest
+
+from life import Life
+import life_generate
+
+
+class TestGenerate(unittest.TestCase):
+    def test_soup(self):
+        """
+        Soups are reproducible, stay inside their area and have roughly the requested density.
+        :return:
+        """
+        a = life_generate.soup(100, 80, 0.3, seed=7, tile_size=32)
+        assert a == life_generate.soup(100, 80, 0.3, seed=7, tile_size=32)
+        assert a != life_generate.soup(100, 80, 0.3, seed=8, tile_size=32)
+        assert all(0 <= x < 100 and 0 <= y < 80 for x, y in a)
+        assert 0.25 < len(a) / 8000 < 0.35
+        assert len(life_generate.soup(10, 10, 1.0)) == 100
+        assert len(life_generate.soup(10, 10, 0.0)) == 0
+
+    def test_soup_offset(self):
+        """
+        Moving the soup does not change its contents.
+        :return:
+        """
+        a = life_generate.soup(50, 50, seed=3, tile_size=16)
+        b = life_generate.soup(50, 50, seed=3, x=-10, y=20, tile_size=16)
+        assert b == a.translate(-10, 20)
+
+    def test_soup_workers(self):
+        """
+        Tiles use independent random streams, so the soup does not depend on the number of worker processes.
+        :return:
+        """
+        a = life_generate.soup(100, 100, seed=5, tile_size=16)
+        b = life_generate.soup(100, 100, seed=5, tile_size=16, workers=2)
+        assert a == b
+
+    def test_tiled(self):
+        """
+        Tiling a block 3 x 2 times with a gap of 2 cells.
+        :return:
+        """
+        block = Life()
+        block.load('patterns/block.txt')
+        alive = life_generate.tiled(block, 3, 2, x=10, y=-5)
+        assert len(alive) == 24
+        assert alive.has(10, -5) and alive.has(11, -4)
+        assert alive.has(14, -5) and alive.has(18, -1)
+        assert not alive.has(12, -5)
+        assert len(life_generate.tiled([], 3, 3)) == 0
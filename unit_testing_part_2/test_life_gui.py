@@ -0,0 +1,188 @@
+import os
+import time
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # noqa: E402
+from parameterized import parameterized  # noqa: E402
+
+from life import Life  # noqa: E402
+import life_generate  # noqa: E402
+import life_gui  # noqa: E402
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode(
+            [life_gui.SCREEN_SIZE, life_gui.SCREEN_SIZE])
+
+    def tearDown(self):
+        pygame.quit()
+
+    def _full_draw(self, alive, basex, basey, scale):
+        surface = pygame.Surface(self.screen.get_size())
+        life_gui.Renderer(surface).draw(alive, basex, basey, scale)
+        return pygame.surfarray.array3d(surface)
+
+    @parameterized.expand([(scale,) for scale in life_gui.ZOOM_LEVELS])
+    def test_scroll(self, scale):
+        """
+        Panning scrolls the screen, and the result must match a full draw at the same view, including when the last cell is only partly on the screen.
+        :return:
+        """
+        alive = life_generate.soup(300, 300, 0.4, seed=1, x=-100, y=-100)
+        renderer = life_gui.Renderer(self.screen)
+        basex, basey = -50, -50
+        renderer.draw(alive, basex, basey, scale)
+        step = max(2, int(20 // scale))
+        for dx, dy in [(step, 0), (0, step), (-step, 0), (0, -step),
+                       (step, step), (-step, -step)]:
+            basex += dx
+            basey += dy
+            renderer.draw(alive, basex, basey, scale)
+            assert (pygame.surfarray.array3d(self.screen) ==
+                    self._full_draw(alive, basex, basey, scale)).all()
+
+    def test_density(self):
+        """
+        Each pixel of the density counts the cells of its block, and the cells outside of the area are ignored.
+        :return:
+        """
+        alive = life_generate.soup(60, 60, 0.4, seed=2, x=-30, y=-30)
+        renderer = life_gui.Renderer(self.screen)
+        shades = renderer.density(alive, -8, -4, 4, width=5, height=3)
+        for px in range(5):
+            for py in range(3):
+                count = sum(alive.has(-8 + px * 4 + i, -4 + py * 4 + j)
+                            for i in range(4) for j in range(4))
+                expected = 64 + 191 * count // 16 if count else 0
+                assert shades[px, py] == expected
+
+
+class TestSimulation(unittest.TestCase):
+    def _glider(self):
+        life = Life()
+        life.load('patterns/glider.txt')
+        return life
+
+    def _start(self, simulation):
+        simulation.start()
+        self.addCleanup(simulation.stop)
+        return simulation
+
+    def _wait(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    def test_edit_paused(self):
+        """
+        Edits are applied between generations and published while the simulation is paused.
+        :return:
+        """
+        simulation = life_gui.Simulation(self._glider())
+        simulation.set_paused(True)
+        self._start(simulation)
+        generation, cells = simulation.frames.get(timeout=5)
+        assert generation == 0
+        simulation.edit(lambda life: life.toggle(10, 10))
+        generation, cells = simulation.frames.get(timeout=5)
+        assert generation == 0
+        assert cells.has(10, 10)
+        # the published cells are a copy that later edits do not modify
+        simulation.edit(lambda life: life.toggle(10, 10))
+        simulation.frames.get(timeout=5)
+        assert cells.has(10, 10)
+        assert simulation.life.generation == 0
+
+    def test_queue_full(self):
+        """
+        When the queue is full, the oldest frame is dropped and the newest is kept.
+        :return:
+        """
+        life = self._glider()
+        simulation = life_gui.Simulation(life, queue_size=2)
+        for generation in range(5):
+            life.generation = generation
+            simulation._publish()
+        assert simulation.frames.qsize() == 2
+        assert simulation.frames.get_nowait()[0] == 3
+        assert simulation.latest()[0] == 4
+        assert simulation.latest() is None
+
+    def test_turbo(self):
+        """
+        In turbo mode only every TURBO_STEP generations is published.
+        :return:
+        """
+        life = self._glider()
+        simulation = life_gui.Simulation(life, queue_size=1000)
+        simulation.set_turbo(True)
+        self._start(simulation)
+        step = simulation.TURBO_STEP
+        self._wait(lambda: life.generation >= 4 * step)
+        simulation.stop()
+        generations = []
+        while not simulation.frames.empty():
+            generations.append(simulation.frames.get_nowait()[0])
+        assert generations[0] == 0
+        assert len(generations) >= 4
+        assert all(generation % step == 0 for generation in generations)
+
+    def test_rate(self):
+        """
+        Without turbo, every generation is published.
+        :return:
+        """
+        life = self._glider()
+        simulation = life_gui.Simulation(life, queue_size=1000)
+        simulation.set_rate(life_gui.MAX_RATE)
+        self._start(simulation)
+        self._wait(lambda: life.generation >= 5)
+        simulation.stop()
+        generations = []
+        while not simulation.frames.empty():
+            generations.append(simulation.frames.get_nowait()[0])
+        assert generations == list(range(len(generations)))
+        assert simulation.advance_time > 0
+
+    def test_stop(self):
+        """
+        stop() ends the thread and waits for it, also when it is paused.
+        :return:
+        """
+        for paused in (False, True):
+            simulation = life_gui.Simulation(self._glider())
+            simulation.set_paused(paused)
+            simulation.start()
+            simulation.stop()
+            assert not simulation.is_alive()
+
+
+class TestLineCells(unittest.TestCase):
+    @parameterized.expand([
+        ((0, 0, 0, 0), [(0, 0)]),
+        ((0, 0, 5, 2), [(0, 0), (1, 0), (2, 1), (3, 1), (4, 2), (5, 2)]),
+        ((3, 3, 3, -1), [(3, 3), (3, 2), (3, 1), (3, 0), (3, -1)]),
+        ((0, 0, -3, -3), [(0, 0), (-1, -1), (-2, -2), (-3, -3)]),
+        ((0, 0, -2, -4), [(0, 0), (-1, -1), (-1, -2), (-2, -3), (-2, -4)]),
+    ])
+    def test_line_cells(self, line, expected):
+        assert life_gui.line_cells(*line) == expected
+
+    def test_line_cells_connected(self):
+        """
+        Consecutive cells of a line touch, so a drag leaves no gaps.
+        :return:
+        """
+        for x1, y1 in [(7, 3), (-9, 20), (13, -13), (0, -6)]:
+            cells = life_gui.line_cells(2, 1, x1, y1)
+            assert cells[0] == (2, 1)
+            assert cells[-1] == (x1, y1)
+            assert len(cells) == max(abs(x1 - 2), abs(y1 - 1)) + 1
+            assert all(max(abs(ax - bx), abs(ay - by)) == 1
+                       for (ax, ay), (bx, by) in zip(cells, cells[1:]))
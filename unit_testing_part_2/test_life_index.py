@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import life_index
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for pattern in ['block.txt', 'blinker.txt', 'glider.txt',
+                        'pulsar.txt', 'diehard.txt']:
+            shutil.copy(os.path.join('patterns', pattern), self.directory)
+        shutil.copy('pattern4.txt', self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_describe(self):
+        """
+        describe() finds the period and displacement of each pattern.
+        :return:
+        """
+        entry = life_index.describe('patterns/glider.txt')
+        assert entry['kind'] == 'spaceship'
+        assert entry['period'] == 4
+        assert entry['displacement'] == [1, 1]
+        assert entry['population'] == 5
+        assert entry['rule'] == '23/3'
+        entry = life_index.describe('patterns/r-pentomino.txt', 10)
+        assert entry['kind'] == 'unknown'
+        assert entry['period'] is None
+
+    def test_build_and_query(self):
+        """
+        The index is written to disk, skips unknown formats and answers queries without simulating.
+        :return:
+        """
+        index = life_index.build_index(self.directory, 200)
+        assert 'pattern4.txt' not in index
+        assert life_index.load_index(self.directory) == index
+        assert life_index.query(index, kind='oscillator') == \
+            ['blinker.txt', 'pulsar.txt']
+        assert life_index.query(index, kind='oscillator', period=3,
+                                max_population=50) == ['pulsar.txt']
+        assert life_index.query(index, min_population=4, max_population=5) == \
+            ['block.txt', 'glider.txt']
+        assert life_index.query(index, kind='stabilizes') == ['diehard.txt']
+        assert life_index.query(index, rule='34/3') == []
+
+    def test_rebuild_reuses_entries(self):
+        """
+        Unchanged files are not described again when the index is rebuilt.
+        :return:
+        """
+        life_index.build_index(self.directory, 200)
+        with mock.patch.object(life_index, 'describe') as mock_describe:
+            index = life_index.build_index(self.directory, 200)
+        assert mock_describe.call_count == 0
+        assert len(index) == 5
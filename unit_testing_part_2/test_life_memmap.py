@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from life import Life
+from life_memmap import MemmapLife
+
+
+class TestMemmapLife(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'grid.dat')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_advance(self):
+        """
+        Small bands force the sliding window to cross band boundaries, and the result must match the CellList engine.
+        :return:
+        """
+        life = Life()
+        life.load('patterns/r-pentomino.txt')
+        life.alive = life.alive.translate(30, 30)
+        grid = MemmapLife(self.path, 61, 70, band_height=4)
+        grid.add_cells(life.living_cells())
+        for i in range(30):
+            life.advance()
+            grid.advance()
+        assert set(grid.living_cells()) == set(life.living_cells())
+        assert grid.population() == len(life.alive)
+        assert grid.generation == 30
+
+    def test_edges(self):
+        """
+        Cells outside the grid are dead, so a blinker at the edge dies out.
+        :return:
+        """
+        grid = MemmapLife(self.path, 10, 10, band_height=3)
+        for y in range(3):
+            grid.toggle(0, y)
+        grid.advance()
+        assert set(grid.living_cells()) == {(0, 1), (1, 1)}
+        assert not grid.has(-1, 1)
+        with pytest.raises(ValueError):
+            grid.toggle(10, 0)
+
+    def test_reopen(self):
+        """
+        The grid and the generation are stored in the file.
+        :return:
+        """
+        grid = MemmapLife(self.path, 20, 20)
+        grid.add_cells([(5, 5), (6, 5), (7, 5), (100, 100)])
+        grid.advance()
+        del grid
+        grid = MemmapLife(self.path)
+        assert (grid.width, grid.height, grid.generation) == (20, 20, 1)
+        assert set(grid.living_cells()) == {(6, 4), (6, 5), (6, 6)}
+        with pytest.raises(ValueError):
+            MemmapLife(os.path.join(self.directory, 'new.dat'))
@@ -0,0 +1,134 @@
+import unittest
+
+from parameterized import parameterized
+
+from life import Life
+from life_packed import PackedCellList, PackedLife, pack, unpack
+
+
+class TestPackedCellList(unittest.TestCase):
+    @parameterized.expand([(0, 0), (5, -3), (-1, -1), (-7, 12),
+                           (2 ** 31 - 1, -2 ** 31), (-2 ** 31, 2 ** 31 - 1)])
+    def test_pack(self, x, y):
+        assert unpack(pack(x, y)) == (x, y)
+
+    def test_set(self):
+        c = PackedCellList()
+        c.set(1, 2, True)
+        c.set(-1, 2)
+        c.set(3, -4)
+        assert c.has(1, 2)
+        assert (-1, 2) in c
+        assert not c.has(2, 1)
+        c.set(3, -4)
+        c.set(5, 5, False)
+        assert sorted(c) == [(-1, 2), (1, 2)]
+        assert len(c) == 2
+
+    def test_add_rows(self):
+        c = PackedCellList()
+        c.add_rows({0: [0, 1], -3: range(3)})
+        c.add_rows({0: [2]})
+        assert sorted(c) == [(0, -3), (0, 0), (1, -3), (1, 0), (2, -3),
+                             (2, 0)]
+
+    def test_set_algebra(self):
+        """
+        The set operations give the same cells as the CellList operations.
+        :return:
+        """
+        a = [(0, 0), (1, 0), (-1, 5)]
+        b = [(1, 0), (2, 2)]
+        packed_a = PackedCellList.from_cells(a)
+        packed_b = PackedCellList.from_cells(b)
+        assert sorted(packed_a | packed_b) == sorted(set(a) | set(b))
+        assert sorted(packed_a & packed_b) == [(1, 0)]
+        assert sorted(packed_a - packed_b) == [(-1, 5), (0, 0)]
+        assert sorted(packed_a ^ packed_b) == [(-1, 5), (0, 0), (2, 2)]
+        assert sorted(packed_a.translate(-2, 3)) == [(-3, 8), (-2, 3),
+                                                     (-1, 3)]
+        copy = packed_a.copy()
+        assert copy == packed_a
+        copy.set(9, 9)
+        assert copy != packed_a
+        assert not packed_a.has(9, 9)
+
+    def test_as_array(self):
+        c = PackedCellList.from_cells([(1, -2), (-3, 4)])
+        view = c.as_array()
+        assert view.shape == (2, 2)
+        assert sorted(map(tuple, view.tolist())) == [(-3, 4), (1, -2)]
+        assert c.as_array() is view
+        c.set(0, 0)
+        assert c.as_array().shape == (3, 2)
+        assert c.as_array().readonly
+        # the signs of both coordinates survive the unpacking
+        cells = [(-2 ** 31, 2 ** 31 - 1), (2 ** 31 - 1, -2 ** 31), (-1, -1)]
+        view = PackedCellList.from_cells(cells).as_array()
+        assert view.format == 'i'
+        assert sorted(map(tuple, view.tolist())) == sorted(cells)
+        assert PackedCellList().as_array().tolist() == []
+
+    @parameterized.expand([(-2, -2, 3, 4), (-100, -100, 100, 100),
+                           (5, 5, 5, 9)])
+    def test_query(self, x0, y0, x1, y1):
+        cells = [(x, y) for x in range(-5, 6) for y in range(-5, 6)
+                 if (x * y) % 3 == 0]
+        c = PackedCellList.from_cells(cells)
+        assert set(c.query(x0, y0, x1, y1)) == {
+            (x, y) for x, y in cells if x0 <= x < x1 and y0 <= y < y1}
+
+
+class TestPackedLife(unittest.TestCase):
+    @parameterized.expand([('patterns/r-pentomino.txt',),
+                           ('patterns/gosper-glider-gun.txt',),
+                           ('patterns/pulsar.txt',)])
+    def test_advance(self, pattern):
+        """
+        The packed engine gives the same generations as the CellList engine.
+        :return:
+        """
+        life = Life()
+        life.load(pattern)
+        packed = PackedLife()
+        packed.load(pattern)
+        assert isinstance(packed.alive, PackedCellList)
+        for i in range(50):
+            life.advance()
+            packed.advance()
+            assert set(packed.living_cells()) == set(life.living_cells())
+        assert packed.generation == 50
+
+    def test_survival_zero(self):
+        packed = PackedLife([0], [3])
+        packed.toggle(-10, -10)
+        packed.advance()
+        assert sorted(packed.living_cells()) == [(-10, -10)]
+
+    def test_life_features(self):
+        """
+        The history, forks and statistics of the Life class work with packed cells.
+        :return:
+        """
+        packed = PackedLife()
+        packed.load('patterns/glider.txt')
+        start = set(packed.living_cells())
+        assert packed.period() == (0, 4, 1, 1)
+        packed.keep_history(checkpoint_interval=3)
+        fork = packed.fork()
+        assert isinstance(fork, PackedLife)
+        stats = packed.instrument()
+        for i in range(8):
+            packed.advance()
+        assert isinstance(packed.alive, PackedCellList)
+        assert len(stats.generations) == 8
+        # the statistics come from the packed algorithm, which probes the
+        # grid once for each cell that has neighbors
+        entry = stats.generations[-1]
+        assert set(entry['time']) == set(PackedLife.PHASES)
+        assert entry['has_probes'] == entry['cells_examined'] > 0
+        assert set(packed.at(0)) == start
+        packed.rewind(4)
+        assert set(packed.living_cells()) == {(x + 1, y + 1)
+                                              for x, y in start}
+        assert set(fork.living_cells()) == start
@@ -0,0 +1,84 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+from life import Life
+import life_record
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _decode_png(self, data):
+        assert data[:8] == b'\x89PNG\r\n\x1a\n'
+        chunks = {}
+        i = 8
+        while i < len(data):
+            length, = struct.unpack('>I', data[i:i + 4])
+            chunk_type = data[i + 4:i + 8]
+            chunk = data[i + 8:i + 8 + length]
+            crc, = struct.unpack('>I', data[i + 8 + length:i + 12 + length])
+            assert crc == zlib.crc32(chunk_type + chunk)
+            chunks[chunk_type] = chunk
+            i += 12 + length
+        width, height = struct.unpack('>II', chunks[b'IHDR'][:8])
+        raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8)
+        return raw.reshape(height, width * 3 + 1)[:, 1:].reshape(
+            height, width, 3)
+
+    def test_render(self):
+        """
+        Cells are drawn inside a grid like in life_gui, and cells outside the image are ignored.
+        :return:
+        """
+        image = life_record.render([(0, 0), (2, 1), (-1, 0), (9, 9)], 30, 20,
+                                   10)
+        assert image.shape == (20, 30, 3)
+        assert tuple(image[0, 5]) == life_record.GRID_COLOR
+        assert tuple(image[5, 10]) == life_record.GRID_COLOR
+        assert tuple(image[1, 5]) == life_record.BACKGROUND_COLOR
+        assert tuple(image[9, 5]) == life_record.BACKGROUND_COLOR
+        assert tuple(image[2, 2]) == life_record.CELL_COLOR
+        assert tuple(image[8, 8]) == life_record.CELL_COLOR
+        assert tuple(image[15, 25]) == life_record.CELL_COLOR
+        assert tuple(image[15, 15]) == life_record.BACKGROUND_COLOR
+        assert (image == life_record.CELL_COLOR).all(axis=2).sum() == 2 * 49
+
+    def test_encode_png(self):
+        image = np.random.default_rng(1).integers(0, 256, (7, 5, 3),
+                                                  dtype=np.uint8)
+        assert (self._decode_png(life_record.encode_png(image)) ==
+                image).all()
+
+    def test_record(self):
+        """
+        Every recorded frame shows the generation it was taken from.
+        :return:
+        """
+        life = Life()
+        life.load('patterns/glider.txt')
+        expected = Life()
+        expected.load('patterns/glider.txt')
+        frames = life_record.record(life, 6, self.directory, 60, 40, 5,
+                                    basex=-2, basey=-2, every=2, workers=2)
+        assert frames == 4
+        assert life.generation == 6
+        assert sorted(os.listdir(self.directory)) == [
+            f'frame_{i:06d}.png' for i in range(4)]
+        for i in range(4):
+            with open(os.path.join(self.directory,
+                                   f'frame_{i:06d}.png'), 'rb') as f:
+                image = self._decode_png(f.read())
+            cells = [(x + 2, y + 2) for x, y in expected.living_cells()]
+            assert (image == life_record.render(cells, 60, 40, 5)).all()
+            expected.advance()
+            expected.advance()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+
+from life import Life
+import life_server
+
+
+class TestLifeServer(unittest.TestCase):
+    def _life(self):
+        life = Life()
+        life.load('patterns/glider.txt')
+        life.toggle(100, 100)
+        life.toggle(100, 101)
+        life.toggle(100, 102)
+        return life
+
+    def test_encode(self):
+        """
+        Messages survive a round trip through a stream.
+        :return:
+        """
+        async def round_trip():
+            reader = asyncio.StreamReader()
+            reader.feed_data(life_server.encode(
+                life_server.DELTA, 7, [(1, 2), (-3, 4)], [(5, -6)]))
+            return await life_server.read_message(reader)
+
+        assert asyncio.run(round_trip()) == \
+            (life_server.DELTA, 7, [(1, 2), (-3, 4)], [(5, -6)])
+
+    def test_stream(self):
+        """
+        A client that joins late receives a keyframe, and applying the deltas that follow reproduces the simulation.
+        A second client only receives the cells inside its viewport.
+        :return:
+        """
+        async def run():
+            server = life_server.LifeServer(self._life(), tick=0)
+            tcp_server = await server.start('localhost', 0)
+            port = tcp_server.sockets[0].getsockname()[1]
+            await server.run(3)
+
+            reader, writer = await asyncio.open_connection('localhost', port)
+            viewport_reader, viewport_writer = await asyncio.open_connection(
+                'localhost', port)
+            viewport_writer.write(life_server.VIEWPORT_MESSAGE.pack(
+                life_server.VIEWPORT, 90, 90, 20, 20))
+            message_type, generation, cells, _ = await life_server.read_message(
+                reader)
+            assert (message_type, generation) == (life_server.KEYFRAME, 3)
+            alive = set(cells)
+            # wait for the viewport to be applied before running the game
+            while True:
+                message = await life_server.read_message(viewport_reader)
+                if set(message[2]) == {(99, 101), (100, 101), (101, 101)}:
+                    break
+
+            await server.run(5)
+            for i in range(5):
+                message_type, generation, births, deaths = \
+                    await life_server.read_message(reader)
+                assert (message_type, generation) == (life_server.DELTA,
+                                                      4 + i)
+                alive = (alive | set(births)) - set(deaths)
+            assert alive == set(server.life.living_cells())
+            message_type, generation, births, deaths = \
+                await life_server.read_message(viewport_reader)
+            assert all(90 <= x < 110 and 90 <= y < 110
+                       for x, y in births + deaths)
+            writer.close()
+            viewport_writer.close()
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+        asyncio.run(run())
+
+    def test_slow_client(self):
+        """
+        A client with a full queue gets a keyframe instead of more deltas.
+        :return:
+        """
+        async def run():
+            server = life_server.LifeServer(self._life(), queue_size=2)
+            client = life_server._Client(None, 2)
+            server.clients.add(client)
+            for generation in range(1, 4):
+                server.broadcast(generation, server.life.alive,
+                                 server.life.alive)
+            assert client.queue.qsize() == 1
+            assert client.queue.get_nowait() is life_server._SEND_KEYFRAME
+
+        asyncio.run(run())